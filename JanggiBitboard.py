@@ -0,0 +1,324 @@
+# Description: This file contains a bitboard representation of a Janggi position. Each
+# type of piece for each player is stored as a 90-bit integer mask, where bit n is set
+# when a piece is on the square with index n (see SQUARES in JanggiGame.py). Moves and
+# attacks are generated from masks that are precomputed for every square, so questions
+# such as "is any enemy piece attacking the general" take a few AND/OR operations.
+# Chariot and Cannon moves along ranks and files are looked up from tables indexed by
+# the occupancy of the rank or file, which has only 2^9 or 2^10 possible values.
+
+from JanggiGame import (SQUARE_INDEX, General, Guard, Horse, Elephant, Chariot, Cannon,
+                        Soldier, _PALACE_MOVES, _HORSE_MOVES, _ELEPHANT_MOVES,
+                        _SOLDIER_MOVES, _RAYS)
+
+PIECE_TYPES = (General, Guard, Horse, Elephant, Chariot, Cannon, Soldier)
+
+
+def square_mask(squares):
+    """Function takes as a parameter an iterable of square indices and returns a mask
+    with the bits of those squares set."""
+    mask = 0
+    for square in squares:
+        mask |= 1 << square
+    return mask
+
+
+def mask_squares(mask):
+    """Function takes as a parameter a mask and yields the index of each square whose
+    bit is set, from the lowest index to the highest."""
+    while mask:
+        low_bit = mask & -mask
+        yield low_bit.bit_length() - 1
+        mask ^= low_bit
+
+
+def _nearest(blockers, step):
+    """Function takes as parameters a non-empty mask of blocking pieces along a ray and
+    the index step of the ray. Returns the index of the blocker closest to the start of
+    the ray, which is the lowest bit for rays stepping up through the indices and the
+    highest bit for rays stepping down."""
+    if step > 0:
+        return (blockers & -blockers).bit_length() - 1
+    return blockers.bit_length() - 1
+
+
+def _diagonal_ray_masks(square):
+    """Function takes as a parameter the index of a square and returns a dictionary of
+    the index step of each palace-diagonal ray from that square to the mask of the
+    squares on the ray. Straight rays are handled by the rank and file tables."""
+    return {ray[0] - square: square_mask(ray) for ray in _RAYS[square]
+            if abs(ray[0] - square) in (8, 10)}
+
+
+def _line_table(length, spacing):
+    """Function takes as parameters the number of squares on a line (9 for a rank, 10
+    for a file) and the index step between neighbouring squares on that line (1 for a
+    rank, 9 for a file). Returns a table indexed by [position on the line][occupancy of
+    the line], where each entry is a (Chariot mask, Cannon jumps) pair. The Chariot mask
+    holds every square reached before and including the first piece in each direction.
+    The Cannon jumps are (screen offset, mask) pairs for each direction with a screen,
+    where the mask holds every square past the screen up to and including the next
+    piece. Masks and offsets are for the line through the first rank or file, and are
+    shifted onto the actual line when they are used."""
+    table = []
+    for position in range(length):
+        entries = []
+        for occupancy in range(1 << length):
+            reach = 0
+            jumps = []
+            for direction in (-1, 1):
+                look = position + direction
+                while 0 <= look < length and not occupancy >> look & 1:
+                    reach |= 1 << look * spacing
+                    look += direction
+                if not 0 <= look < length:
+                    continue
+                reach |= 1 << look * spacing
+                screen = look
+                jump = 0
+                look += direction
+                while 0 <= look < length:
+                    jump |= 1 << look * spacing
+                    if occupancy >> look & 1:
+                        break
+                    look += direction
+                if jump:
+                    jumps.append((screen * spacing, jump))
+            entries.append((reach, tuple(jumps)))
+        table.append(tuple(entries))
+    return tuple(table)
+
+
+def _reverse_table(table):
+    """Function takes as a parameter a per-square table of moves, where each move is a
+    tuple ending in its destination square, and returns a per-square table of
+    (origin mask, mask of the other squares in the move) pairs that reach each square."""
+    reverse = [[] for square in range(90)]
+    for origin in range(90):
+        for move in table[origin]:
+            reverse[move[-1]].append((1 << origin, square_mask(move[:-1])))
+    return tuple(tuple(entries) for entries in reverse)
+
+
+# masks built once when the module is imported
+_DIAGONAL_RAY_MASKS = tuple(_diagonal_ray_masks(square) for square in range(90))
+_RANK_TABLE = _line_table(9, 1)
+_FILE_TABLE = _line_table(10, 9)
+_FILE_BITS = tuple(1 << (square % 9) * 10 + square // 9 for square in range(90))
+_PALACE_MASKS = {player: tuple(square_mask(moves) for moves in _PALACE_MOVES[player])
+                 for player in ('blue', 'red')}
+_SOLDIER_MASKS = {player: tuple(square_mask(moves) for moves in _SOLDIER_MOVES[player])
+                  for player in ('blue', 'red')}
+_HORSE_MASKS = tuple(tuple((1 << leg, 1 << move) for leg, move in moves)
+                     for moves in _HORSE_MOVES)
+_ELEPHANT_MASKS = tuple(tuple((square_mask(legs), 1 << move) for *legs, move in moves)
+                        for moves in _ELEPHANT_MOVES)
+_HORSE_ATTACKERS = _reverse_table(_HORSE_MOVES)
+_ELEPHANT_ATTACKERS = _reverse_table(_ELEPHANT_MOVES)
+_SOLDIER_ATTACKERS = {player: tuple(square_mask(origin for origin in range(90)
+                                                if target in _SOLDIER_MOVES[player][origin])
+                                    for target in range(90))
+                      for player in ('blue', 'red')}
+
+
+def chariot_attacks(square, occupied, files):
+    """Function takes as parameters the index of a square, a mask of all occupied
+    squares and the file-major occupancy mask of the same squares. Returns a mask of the
+    squares a Chariot on the square reaches: every square along each line up to and
+    including the first piece. The rank and file are looked up by their occupancy."""
+    row, col = divmod(square, 9)
+    rank_shift = row * 9
+    attacks = _RANK_TABLE[col][occupied >> rank_shift & 0x1FF][0] << rank_shift
+    attacks |= _FILE_TABLE[row][files >> col * 10 & 0x3FF][0] << col
+    for step, ray in _DIAGONAL_RAY_MASKS[square].items():
+        blockers = ray & occupied
+        if blockers:
+            attacks |= ray ^ _DIAGONAL_RAY_MASKS[_nearest(blockers, step)].get(step, 0)
+        else:
+            attacks |= ray
+    return attacks
+
+
+def cannon_attacks(square, occupied, files, cannons):
+    """Function takes as parameters the index of a square, a mask of all occupied
+    squares, the file-major occupancy mask of the same squares and a mask of the squares
+    holding Cannons. Returns a mask of the squares a Cannon on the square reaches by
+    jumping a screen that is not a Cannon: every square past the screen up to and
+    including the next piece. The rank and file are looked up by their occupancy."""
+    row, col = divmod(square, 9)
+    rank_shift = row * 9
+    attacks = 0
+    for screen, jump in _RANK_TABLE[col][occupied >> rank_shift & 0x1FF][1]:
+        if not cannons >> rank_shift + screen & 1:
+            attacks |= jump << rank_shift
+    for screen, jump in _FILE_TABLE[row][files >> col * 10 & 0x3FF][1]:
+        if not cannons >> col + screen & 1:
+            attacks |= jump << col
+    for step, ray in _DIAGONAL_RAY_MASKS[square].items():
+        blockers = ray & occupied
+        if not blockers:
+            continue
+        screen = _nearest(blockers, step)
+        if cannons >> screen & 1:
+            continue
+        beyond = _DIAGONAL_RAY_MASKS[screen].get(step, 0)
+        targets = beyond & occupied
+        if targets:
+            attacks |= beyond ^ _DIAGONAL_RAY_MASKS[_nearest(targets, step)].get(step, 0)
+        else:
+            attacks |= beyond
+    return attacks
+
+
+class Bitboard:
+    """Class represents a Janggi position as integer masks. Bitboard keeps one mask for
+    each type of piece of each player, plus masks of the squares occupied by each player.
+    It can be built from a JanggiGame and then updated move by move, and it produces the
+    same moves as the check_move method of each Piece (without the passing move)."""
+
+    def __init__(self, game=None):
+        """Initializes private data members for Bitboard. Private data members include
+        a mask for every (player, piece type) pair and a mask of the squares occupied by
+        each player. If a JanggiGame is passed, its pieces are copied onto the masks."""
+        self._pieces = {(player, piece_type): 0 for player in ('blue', 'red')
+                        for piece_type in PIECE_TYPES}
+        self._occupied = {'blue': 0, 'red': 0}
+        self._files = 0
+        if game is not None:
+            for square, piece in game.get_game_board().items():
+                if piece is not None:
+                    self.set_square(SQUARE_INDEX[square], piece)
+
+    def get_pieces(self, player, piece_type):
+        """Method takes as parameters a player color and a Piece subclass and returns
+        the mask of the squares holding that player's pieces of that type."""
+        return self._pieces[(player, piece_type)]
+
+    def get_occupied(self, player=None):
+        """Method takes an optional parameter of a player color and returns the mask of
+        the squares occupied by that player's pieces. If the optional parameter is not
+        passed an argument, the mask of all occupied squares is returned."""
+        if player is None:
+            return self._occupied['blue'] | self._occupied['red']
+        return self._occupied[player]
+
+    def get_file_occupancy(self):
+        """Method takes no parameters and returns the file-major mask of all occupied
+        squares, in which the ten squares of each file are stored next to each other.
+        This mask is passed to the sliding attack lookups along with get_occupied()."""
+        return self._files
+
+    def get_piece(self, square):
+        """Method takes as a parameter the index of a square and returns a (player,
+        piece type) pair for the piece on the square, or None if the square is empty."""
+        for key, mask in self._pieces.items():
+            if mask >> square & 1:
+                return key
+        return None
+
+    def set_square(self, square, piece=None):
+        """Method takes as parameters the index of a square and an optional Piece. Any
+        piece on the square is removed, and if the Piece parameter is included, the
+        square is set to hold that Piece."""
+        key = self.get_piece(square)
+        bit = 1 << square
+        if key is not None:
+            self._pieces[key] ^= bit
+            self._occupied[key[0]] ^= bit
+            self._files ^= _FILE_BITS[square]
+        if piece is not None:
+            self._pieces[(piece.get_player(), type(piece))] |= bit
+            self._occupied[piece.get_player()] |= bit
+            self._files |= _FILE_BITS[square]
+
+    def move_piece(self, current_sq, move_sq):
+        """Method takes as parameters the index of the square a piece is moving from and
+        the index of the square it is moving onto. The masks are updated for the move,
+        and the (player, piece type) pair of any captured piece is returned. Moving a
+        piece onto the square it is already on (passing) changes nothing."""
+        if current_sq == move_sq:
+            return None
+        key = self.get_piece(current_sq)
+        captured = self.get_piece(move_sq)
+        move_bits = (1 << current_sq) | (1 << move_sq)
+        if captured is not None:
+            self._pieces[captured] ^= 1 << move_sq
+            self._occupied[captured[0]] ^= 1 << move_sq
+        else:
+            self._files ^= _FILE_BITS[move_sq]
+        self._pieces[key] ^= move_bits
+        self._occupied[key[0]] ^= move_bits
+        self._files ^= _FILE_BITS[current_sq]
+        return captured
+
+    def get_moves(self, square):
+        """Method takes as a parameter the index of a square holding a piece and returns
+        the mask of the squares that piece could move onto, excluding passing."""
+        player, piece_type = self.get_piece(square)
+        occupied = self.get_occupied()
+        own = self._occupied[player]
+
+        if piece_type is Chariot:
+            return chariot_attacks(square, occupied, self._files) & ~own
+        if piece_type is Cannon:
+            cannons = self._pieces[('blue', Cannon)] | self._pieces[('red', Cannon)]
+            return cannon_attacks(square, occupied, self._files, cannons) & ~own & ~cannons
+        if piece_type is Horse:
+            moves = 0
+            for leg, move in _HORSE_MASKS[square]:
+                if not occupied & leg:
+                    moves |= move
+            return moves & ~own
+        if piece_type is Elephant:
+            moves = 0
+            for legs, move in _ELEPHANT_MASKS[square]:
+                if not occupied & legs:
+                    moves |= move
+            return moves & ~own
+        if piece_type is Soldier:
+            return _SOLDIER_MASKS[player][square] & ~own
+        return _PALACE_MASKS[player][square] & ~own
+
+    def get_attacked_squares(self, player):
+        """Method takes as a parameter a player color and returns the mask of all the
+        squares that player's pieces could move onto."""
+        attacked = 0
+        for square in mask_squares(self._occupied[player]):
+            attacked |= self.get_moves(square)
+        return attacked
+
+    def is_attacked(self, square, player):
+        """Method takes as parameters the index of a square and a player color and
+        returns True if one of that player's pieces could capture a piece on the square.
+        Attackers are found by looking outward from the square with the precomputed
+        masks, so no moves are generated for the attacking player."""
+        pieces = self._pieces
+        occupied = self.get_occupied()
+
+        if chariot_attacks(square, occupied, self._files) & pieces[(player, Chariot)]:
+            return True
+        cannons = pieces[('blue', Cannon)] | pieces[('red', Cannon)]
+        if not cannons >> square & 1:
+            if cannon_attacks(square, occupied, self._files, cannons) & pieces[(player, Cannon)]:
+                return True
+        if _SOLDIER_ATTACKERS[player][square] & pieces[(player, Soldier)]:
+            return True
+        if _PALACE_MASKS[player][square] & (pieces[(player, General)] | pieces[(player, Guard)]):
+            return True
+        horses = pieces[(player, Horse)]
+        for origin, leg in _HORSE_ATTACKERS[square]:
+            if horses & origin and not occupied & leg:
+                return True
+        elephants = pieces[(player, Elephant)]
+        for origin, legs in _ELEPHANT_ATTACKERS[square]:
+            if elephants & origin and not occupied & legs:
+                return True
+        return False
+
+    def is_in_check(self, player):
+        """Method takes as a parameter a player color and returns True if that player's
+        General could be captured by an opposing piece on its next move."""
+        general = self._pieces[(player, General)]
+        if not general:
+            return False
+        opponent = 'red' if player == 'blue' else 'blue'
+        return self.is_attacked(general.bit_length() - 1, opponent)
@@ -0,0 +1,113 @@
+# Description: This file contains a time manager that keeps a player's game clock and
+# decides how long the engine may think about each move. It supports sudden death (a
+# fixed amount of main time for the whole game), increments (time added back after each
+# move) and byo-yomi (once the main time is used up, each move must be made within a
+# period, and a period is lost each time one runs out). For each move the time manager
+# gives a soft limit, after which the engine should not start searching deeper, and a
+# hard limit that must never be passed, kept a little short of the time that is actually
+# left so that the search can unwind and the move can be sent in time.
+
+import time
+
+# the number of moves the main time is shared between
+_MOVES_LEFT = 30
+
+# the hard limit is at most this many times the soft limit, unless a byo-yomi period
+# allows more
+_HARD_FACTOR = 4
+
+# the share of a byo-yomi period used as the soft limit once the main time is used up
+_PERIOD_SHARE = 0.5
+
+
+class TimeManager:
+    """Class represents the game clock of one player and the time budget for each of the
+    player's moves. The clock is started at the beginning of the player's turn and
+    stopped once the move is made, and the time taken is charged to the main time and
+    then to the byo-yomi periods. A player who runs out of time has flagged (lost on
+    time)."""
+
+    def __init__(self, main_time, increment=0, byoyomi=0, periods=0, overhead=0.05):
+        """Initializes private data members for a TimeManager. Private data members
+        include the main time left in seconds, the increment added after each move, the
+        length of a byo-yomi period and the number of periods left, the overhead (the
+        time kept back from each hard limit for the move to be made and reach the game,
+        on top of the time the engine keeps back to stop its search), whether the player
+        has flagged, and the time the current turn started (by perf_counter), or None
+        between turns."""
+        self._remaining = main_time
+        self._increment = increment
+        self._byoyomi = byoyomi
+        self._periods = periods if byoyomi > 0 else 0
+        self._overhead = overhead
+        self._flagged = False
+        self._turn_start = None
+
+    def get_remaining(self):
+        """Method takes no parameters and returns the main time left in seconds."""
+        return self._remaining
+
+    def get_periods(self):
+        """Method takes no parameters and returns the number of byo-yomi periods left."""
+        return self._periods
+
+    def is_flagged(self):
+        """Method takes no parameters and returns True if the player has run out of time,
+        or False otherwise."""
+        return self._flagged
+
+    def budget(self):
+        """Method takes no parameters and returns a tuple of the soft and hard limits in
+        seconds for the player's next move. The soft limit is a share of the main time
+        (as if _MOVES_LEFT moves were left) plus the increment, or a share of the
+        byo-yomi period once the main time runs low. The hard limit is _HARD_FACTOR times
+        the soft limit, or the whole byo-yomi period if that is longer, but never more
+        than the time that can be used without losing a period or the game, less the
+        overhead."""
+        period = self._byoyomi if self._periods else 0
+        available = max(self._remaining + period - self._overhead, 0.0)
+        soft = self._remaining / _MOVES_LEFT + self._increment
+        hard = soft * _HARD_FACTOR
+
+        # time in a byo-yomi period is lost if it is not used, so all of it may be used
+        if period:
+            soft = max(soft, period * _PERIOD_SHARE)
+            hard = max(hard, period - self._overhead)
+        hard = min(hard, available)
+        return min(soft, hard), hard
+
+    def start_turn(self):
+        """Method takes no parameters and starts the clock for the player's turn. Returns
+        the budget for the move (see budget)."""
+        self._turn_start = time.perf_counter()
+        return self.budget()
+
+    def end_turn(self):
+        """Method takes no parameters and stops the clock once the player's move is made,
+        charging the time taken since start_turn. Returns the time taken in seconds, or
+        None if the clock was not started."""
+        if self._turn_start is None:
+            return None
+        elapsed = time.perf_counter() - self._turn_start
+        self._turn_start = None
+        self.charge(elapsed)
+        return elapsed
+
+    def charge(self, elapsed):
+        """Method takes as a parameter the number of seconds a move took and charges it
+        to the clock. The time comes out of the main time first, and the increment is
+        added back after the move. Once the main time is used up, a move that takes
+        longer than a byo-yomi period uses up a period for each period it runs past. The
+        player flags if the time runs out with no period left."""
+        if self._flagged:
+            return
+        if elapsed <= self._remaining:
+            self._remaining += self._increment - elapsed
+            return
+        elapsed -= self._remaining
+        self._remaining = 0
+        while self._periods and elapsed > self._byoyomi:
+            self._periods -= 1
+            elapsed -= self._byoyomi
+        if not self._periods:
+            self._flagged = True
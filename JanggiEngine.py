@@ -0,0 +1,813 @@
+# Description: This file contains a search engine that chooses moves for a player in a
+# JanggiGame. The engine runs a negamax alpha-beta search with iterative deepening: it
+# searches one move deep, then two, and so on, until it reaches the requested depth or
+# runs out of time, and answers with the best move of the deepest search it finished.
+# At the end of each line it keeps searching captures until the position is quiet, and
+# captures that lose material in a static exchange are not searched there.
+# Moves are made and taken back on the game's own undo stack, so the game is left as it
+# was found, and search results are kept in a transposition table between moves. Positions
+# are scored by the game's own running evaluation (see JanggiEval.py). With more than one
+# worker, several processes search the same position at once (Lazy SMP): they start at
+# staggered depths and share one transposition table in shared memory, so each finds
+# the results of the others, and the deepest search finished gives the move. Playing on
+# a game clock, the engine takes its time for each move from a TimeManager (see
+# JanggiClock.py), and stops deepening early once the best move has settled. While the
+# opponent thinks, the engine can ponder: it guesses the opponent's reply and searches the
+# position after it on a background thread, and if the guess is played the move is ready.
+
+import copy
+import multiprocessing
+import threading
+import time
+
+import JanggiEval
+from JanggiGame import SQUARES, General, Guard, Horse, Elephant, Chariot, Cannon, Soldier
+from JanggiTransposition import TranspositionTable, EXACT, LOWER, UPPER
+
+# piece values in hundredths of a point, by type of piece
+PIECE_VALUES = {piece_type: JanggiEval.PIECE_VALUES[piece_type.__name__]
+                for piece_type in (General, Guard, Horse, Elephant, Chariot, Cannon, Soldier)}
+
+# in a static exchange the General is the last piece to capture with
+_SEE_VALUES = {**PIECE_VALUES, General: 10000}
+
+# scores of positions where a General is checkmated, counted down by the number of moves
+# to reach them so that faster mates score higher
+MATE_SCORE = 100000
+_MATE_BOUND = MATE_SCORE - 1000
+
+DEFAULT_DEPTH = 3
+MAX_DEPTH = 64
+
+# the clock is read about every _CLOCK_PERIOD seconds. The search counts its work in
+# units (a position visited, a move generated, a capture tried in a static exchange), and
+# the clock is first read after _CLOCK_INTERVAL units, and then after as many units as
+# the slowest units seen so far take to fill a period. Time limits are cut short by
+# _STOP_MARGIN (the longest gaps between reads measured were about 8 ms, when the process
+# was paused, and the search must still unwind and answer), and by _POOL_MARGIN more for
+# the round trip to worker processes
+_CLOCK_PERIOD = 0.001
+_CLOCK_INTERVAL = 16
+_STOP_MARGIN = 0.01
+_POOL_MARGIN = 0.02
+
+# with a soft time limit, deepening stops once the best move has stayed the same for
+# _STABLE_DEPTHS depths and _STABLE_SHARE of the soft limit is used
+_STABLE_DEPTHS = 2
+_STABLE_SHARE = 0.5
+
+# seconds between looks at a pondering search that is being waited on
+_PONDER_POLL = _CLOCK_PERIOD
+
+# null-move pruning: passing is tried first at nodes with at least _NULL_MIN_DEPTH plies
+# left, and searched _NULL_REDUCTION plies less deep (one more with _NULL_DEEP_DEPTH left)
+_NULL_REDUCTION = 2
+_NULL_MIN_DEPTH = 3
+_NULL_DEEP_DEPTH = 6
+
+# late move reductions: quiet moves after the first _LMR_MIN_MOVES are searched one ply
+# less deep (two after the first _LMR_LATE_MOVES) at nodes with at least _LMR_MIN_DEPTH
+# plies left, and searched again in full if they turn out better than expected
+_LMR_MIN_MOVES = 3
+_LMR_LATE_MOVES = 10
+_LMR_MIN_DEPTH = 3
+
+# move ordering scores: the move from the transposition table first, then captures of the
+# most valuable victims by the least valuable attackers, then the killer moves, then the
+# other moves by their history scores (kept below the killers), and passing last
+_ORDER_TT_MOVE = 1 << 40
+_ORDER_CAPTURE = 1 << 30
+_ORDER_KILLER = 1 << 29
+
+
+class SearchTimeout(Exception):
+    """Exception raised inside a search when its time has run out, to unwind it."""
+    pass
+
+
+class JanggiEngine:
+    """Class represents a search engine that plays moves for a JanggiGame. The engine
+    searches the position of the game it is given whenever it is asked for a move, so it
+    follows the game as moves are made. It keeps a transposition table of the positions
+    it has searched, which carries over from one move to the next. An engine with more
+    than one worker searches in a pool of processes, which is kept until close() is
+    called. After its move is made, the engine can be told to ponder on the opponent's
+    time."""
+
+    def __init__(self, game, tt_size_mb=16, workers=1, tt=None):
+        """Initializes private data members for a JanggiEngine. Private data members
+        include the game to search, the transposition table (the one given, or a new one
+        of tt_size_mb megabytes, in shared memory if there is more than one worker), the
+        number of worker processes and their pool (started here, so that starting it
+        does not take from the time of a move), the time the current search must stop
+        by, the event that stops the current search early (if it can be stopped), the
+        result of the last depth finished, the number of depths its best move has stayed
+        the same for and the times (by perf_counter) that depth started and finished,
+        the number of positions visited by the last search, the units of work it has
+        counted, the slowest time per unit seen, the time and number of units the clock
+        was last read at and the number it is next read at (see _read_clock), and the pondering search running in the background (if there is
+        one): a tuple of the engine searching a copy of the game, its thread, the key of
+        the position it searches and the time it started. For move ordering, two killer
+        moves (quiet moves that caused a cutoff) are kept for each ply, and a history
+        score is kept for each pair of squares a move is made from and onto, which grows
+        each time such a move causes a cutoff."""
+        self._game = game
+        if tt is None:
+            tt = TranspositionTable(tt_size_mb, shared=workers > 1)
+        self._tt = tt
+        self._workers = workers
+        self._pool = None
+        if workers > 1:
+            self._pool = multiprocessing.Pool(workers, _smp_worker_start, (tt.get_name(),))
+        self._deadline = None
+        self._stop = None
+        self._result = None
+        self._stable_depths = 0
+        self._depth_times = None
+        self._nodes = 0
+        self._work = 0
+        self._unit_time = 0.0
+        self._clock_work = 0
+        self._clock_time = time.perf_counter()
+        self._next_clock_read = _CLOCK_INTERVAL
+        self._ponder = None
+        self._killers = [[None, None] for ply in range(MAX_DEPTH + 1)]
+        self._history = [0] * (90 * 90)
+
+    def get_game(self):
+        """Method takes no parameters and returns the JanggiGame the engine plays."""
+        return self._game
+
+    def get_nodes(self):
+        """Method takes no parameters and returns the number of positions visited by the
+        most recent search."""
+        return self._nodes
+
+    def close(self):
+        """Method takes no parameters and stops the engine's worker processes and lets
+        go of its shared transposition table, if it has them. Pondering is stopped."""
+        self.stop_pondering()
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+        self._tt.close()
+
+    def best_move(self, depth=None, time_limit=None, clock=None):
+        """Method takes as optional parameters the number of moves to search ahead, a
+        time limit in seconds and the TimeManager of the player whose turn it is (see
+        JanggiClock.py), and returns the best move found for that player, as a pair of
+        squares (strings) that make_move would accept. Passing is returned as the
+        General's square moving onto itself. Without a time limit or clock the search
+        goes to the given depth (DEFAULT_DEPTH if no depth is given). With a time limit
+        it deepens until the depth is reached or time runs out, and the search is cut
+        off as soon as the time is up. With a clock the time limit is the hard limit of
+        the clock's budget for the move, and no deeper search is started once the soft
+        limit is passed, or half of it once the best move has settled. The time taken is
+        charged to the clock. If the engine was pondering and the opponent played the
+        predicted move, the pondering search carries on instead, and its move is returned
+        as soon as it has reached the depth (or the soft limit or time is up). Returns
+        None if the game is over."""
+        game = self._game
+        if game.get_game_state() != 'UNFINISHED':
+            self.stop_pondering()
+            return None
+        if clock is None:
+            return self._best_move(depth, time_limit, None)
+        soft_limit, hard_limit = clock.start_turn()
+        if time_limit is not None:
+            hard_limit = min(time_limit, hard_limit)
+        move = self._best_move(depth, hard_limit, soft_limit)
+        clock.end_turn()
+        return move
+
+    def _best_move(self, depth, time_limit, soft_limit):
+        """Method takes as parameters the depth to search to, the time limit and the soft
+        time limit in seconds (each may be None), and returns the move for best_move."""
+        if depth is None:
+            depth = DEFAULT_DEPTH if time_limit is None else MAX_DEPTH
+        if time_limit is not None:
+            time_limit = max(time_limit - _STOP_MARGIN, 0.0)
+        if self._ponder is not None:
+            best_move = self._ponder_hit(depth, time_limit, soft_limit)
+            if best_move is not None:
+                return SQUARES[best_move[0]], SQUARES[best_move[1]]
+        self._tt.new_search()
+        if self._workers > 1:
+            result = self._parallel_search(depth, time_limit, soft_limit)
+        else:
+            start_time = time.perf_counter()
+            result = self._search(depth, None if time_limit is None else start_time + time_limit,
+                                  soft_deadline=None if soft_limit is None else start_time + soft_limit)
+        if result is None:
+            return None
+        best_move = result[1]
+        return SQUARES[best_move[0]], SQUARES[best_move[1]]
+
+    def _search(self, depth, deadline, first_depth=1, rotation=0, soft_deadline=None):
+        """Method takes as parameters the depth to search to, the time (by perf_counter)
+        to stop by or None, the depth to start deepening from, the number of places to
+        rotate the root moves after the first, which lets helper processes search the
+        moves in different orders, and the time after which no deeper search is started
+        or None. Returns a tuple of (depth of the last search finished, best move as a
+        pair of square indices, its score), or None if there are no moves. If no search
+        finishes in time, the first move is returned with depth 0. The result so far is
+        also kept after each depth, for another thread to read."""
+        game = self._game
+        start_time = time.perf_counter()
+        self._start_search(deadline)
+        self._result = None
+        moves = self._ordered_moves(self._moves(game.get_player_turn()), None, 0)
+        if not moves:
+            return None
+        if rotation and len(moves) > 2:
+            rotation %= len(moves) - 1
+            moves[1:] = moves[1 + rotation:] + moves[1:1 + rotation]
+        result = self._result = (0, moves[0], None)
+        undo_depth = len(game._undo_stack)
+        self._stable_depths = 0
+        try:
+            for search_depth in range(first_depth, depth + 1):
+                depth_start_time = time.perf_counter()
+                best_move, score = self._search_root(moves, search_depth)
+                self._stable_depths = self._stable_depths + 1 if result[0] and best_move == result[1] else 0
+                self._depth_times = (depth_start_time, time.perf_counter())
+                result = self._result = (search_depth, best_move, score)
+                if soft_deadline is not None and self._soft_stop(start_time, soft_deadline):
+                    break
+
+                # the best move is searched first in the next iteration
+                moves.remove(best_move)
+                moves.insert(0, best_move)
+        except SearchTimeout:
+            while len(game._undo_stack) > undo_depth:
+                game._pop()
+        return result
+
+    def _soft_stop(self, start_time, soft_deadline):
+        """Method takes as parameters the time (by perf_counter) a search started and
+        its soft deadline, and returns True if no deeper search should be started after
+        the last depth finished, or False otherwise. A deeper search takes at least as
+        long as the last one, so it is not started if it could not finish before the
+        soft deadline, or before _STABLE_SHARE of the time up to it once the best move
+        has stayed the same for _STABLE_DEPTHS depths."""
+        stop_time = soft_deadline
+        if self._stable_depths >= _STABLE_DEPTHS:
+            stop_time = start_time + (soft_deadline - start_time) * _STABLE_SHARE
+        depth_start_time, depth_end_time = self._depth_times
+        return max(time.perf_counter(), 2 * depth_end_time - depth_start_time) >= stop_time
+
+    def _start_search(self, deadline):
+        """Method takes as a parameter the time (by perf_counter) a search must stop by,
+        or None, and gets ready for the search: the node count, the work count and
+        killer moves are reset, the clock is next read after _CLOCK_INTERVAL units of
+        work, and the history scores of earlier searches are halved."""
+        self._deadline = deadline
+        self._nodes = 0
+        self._work = 0
+        self._unit_time = 0.0
+        self._clock_work = 0
+        self._clock_time = time.perf_counter()
+        self._next_clock_read = _CLOCK_INTERVAL
+        self._killers = [[None, None] for ply in range(MAX_DEPTH + 1)]
+        history = self._history
+        for index, score in enumerate(history):
+            if score:
+                history[index] = score >> 1
+
+    def analyse(self, depth=None, multipv=1, time_limit=None):
+        """Method takes as optional parameters the number of moves to search ahead, the
+        number of best moves to report and a time limit in seconds, and searches the
+        game's position like best_move (in this process). Returns a list of up to
+        multipv tuples, best first, of (move, score, principal variation) for the player
+        whose turn it is. The move is a pair of squares (strings), the score is in
+        hundredths of a point in that player's favour, and the principal variation is a
+        list of the moves expected to follow, starting with the move. All of the moves
+        are searched in one pass over the root: a move only needs an exact score if it
+        could be among the best multipv, so each move is searched against the score of
+        the multipv-th best move so far, and the transposition table serves every line.
+        If time runs out before the first depth is finished, scores are None. Returns an
+        empty list if the game is over or the player has no moves."""
+        game = self._game
+        if game.get_game_state() != 'UNFINISHED':
+            return []
+        if depth is None:
+            depth = DEFAULT_DEPTH if time_limit is None else MAX_DEPTH
+        self._tt.new_search()
+        if time_limit is not None:
+            time_limit = max(time_limit - _STOP_MARGIN, 0.0)
+        self._start_search(None if time_limit is None else time.perf_counter() + time_limit)
+        moves = self._ordered_moves(self._moves(game.get_player_turn()), None, 0)
+        if not moves:
+            return []
+        lines = [(None, move) for move in moves[:multipv]]
+        finished_depth = 0
+        undo_depth = len(game._undo_stack)
+        try:
+            for search_depth in range(1, depth + 1):
+                results = []
+                for move in moves:
+                    bound = results[multipv - 1][0] if len(results) >= multipv else -MATE_SCORE - 1
+                    game._push(move[0], move[1])
+                    score = -self._negamax(search_depth - 1, -MATE_SCORE - 1, -bound, 1, move[0] != move[1])
+                    game._pop()
+
+                    # scores at or below the bound are only upper bounds, and stay out of the best lines
+                    results.append((score, move))
+                    results.sort(key=lambda result: result[0], reverse=True)
+                lines = results[:multipv]
+                finished_depth = search_depth
+                moves = [move for score, move in results]
+                self._tt.store(game.position_key(), search_depth, EXACT, lines[0][0], lines[0][1])
+        except SearchTimeout:
+            while len(game._undo_stack) > undo_depth:
+                game._pop()
+        return [((SQUARES[move[0]], SQUARES[move[1]]), score, self._principal_variation(move, finished_depth))
+                for score, move in lines]
+
+    def _principal_variation(self, move, depth):
+        """Method takes as parameters a root move and the depth it was searched to, and
+        returns a list of the move and the best moves stored in the transposition table
+        for the positions that follow it, as pairs of squares (strings), up to that
+        depth. The line stops early at a position with no stored move, or whose stored
+        move is not legal there (which can happen when positions share a table entry)."""
+        game = self._game
+        line = [move]
+        game._push(move[0], move[1])
+        while len(line) < depth:
+            entry = self._tt.probe(game.position_key())
+            if entry is None or entry[3] is None or entry[3] not in self._moves(game.get_player_turn()):
+                break
+            line.append(entry[3])
+            game._push(entry[3][0], entry[3][1])
+        for line_move in line:
+            game._pop()
+        return [(SQUARES[current_sq], SQUARES[move_sq]) for current_sq, move_sq in line]
+
+    def ponder(self):
+        """Method takes no parameters and starts pondering on the opponent's time, once
+        the engine's own move has been made. The opponent's reply is predicted from the
+        move stored in the transposition table for the position (or by a short search),
+        and the position after it is searched without a depth or time limit on a
+        background thread, using a copy of the game and the engine's transposition
+        table. The next call to best_move uses the search if the prediction was played,
+        and stops it if not. Returns the predicted move as a pair of squares (strings),
+        or None (without pondering) if the game is over or the opponent has no moves."""
+        self.stop_pondering()
+        game = self._game
+        if game.get_game_state() != 'UNFINISHED':
+            return None
+        player = game.get_player_turn()
+        entry = self._tt.probe(game.position_key())
+        if entry is not None and entry[3] in self._moves(player):
+            prediction = entry[3]
+        else:
+            result = self._search(2, None)
+            if result is None:
+                return None
+            prediction = result[1]
+        prediction_squares = SQUARES[prediction[0]], SQUARES[prediction[1]]
+
+        # the search runs on a copy of the game, so the game is free for the opponent's move
+        ponder_game = copy.deepcopy(game)
+        ponder_game.make_move(*prediction_squares)
+        if ponder_game.get_game_state() != 'UNFINISHED':
+            return prediction_squares
+        self._tt.new_search()
+        engine = JanggiEngine(ponder_game, tt=self._tt)
+        engine._history = list(self._history)
+        engine._stop = threading.Event()
+        thread = threading.Thread(target=engine._search, args=(MAX_DEPTH, None), daemon=True)
+        self._ponder = (engine, thread, ponder_game.position_key(), time.perf_counter())
+        thread.start()
+        return prediction_squares
+
+    def is_pondering(self):
+        """Method takes no parameters and returns True if a pondering search is running
+        in the background, or False otherwise."""
+        return self._ponder is not None
+
+    def stop_pondering(self):
+        """Method takes no parameters and stops the pondering search, if there is one,
+        waiting for its thread to finish. What it stored in the transposition table is
+        kept."""
+        if self._ponder is None:
+            return
+        engine, thread, key, start_time = self._ponder
+        self._ponder = None
+        engine._stop.set()
+        thread.join()
+
+    def _ponder_hit(self, depth, time_limit, soft_limit):
+        """Method takes as parameters the depth to search to, and the time limit and soft
+        time limit in seconds or None, and ends pondering. If the game has reached the
+        position being pondered, the pondering search is let run until it finishes the
+        depth, or until the limits are reached, counting the time already spent
+        pondering (see _search for the soft limit). Its best move is returned as a pair
+        of square indices, at once if the limits were reached while pondering. Otherwise
+        the search is stopped and None is returned."""
+        engine, thread, key, start_time = self._ponder
+        if key != self._game.position_key():
+            self.stop_pondering()
+            return None
+        deadline = None if time_limit is None else start_time + time_limit
+        soft_deadline = None if soft_limit is None else start_time + soft_limit
+        while thread.is_alive():
+            result = engine._result
+            if result is not None and result[0] >= depth:
+                break
+            if (result is not None and result[0] and soft_deadline is not None
+                    and engine._soft_stop(start_time, soft_deadline)):
+                break
+            if deadline is None:
+                thread.join(_PONDER_POLL)
+            else:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                thread.join(min(_PONDER_POLL, remaining))
+        self.stop_pondering()
+        self._nodes = engine.get_nodes()
+        if engine._result is None:
+            return None
+        return engine._result[1]
+
+    def _parallel_search(self, depth, time_limit, soft_limit=None):
+        """Method takes as parameters the depth to search to, a time limit in seconds or
+        None and a soft time limit in seconds or None (see _search), and has each worker
+        process search the game's position with the shared transposition table. Worker n
+        starts deepening at depth 1 + n % 2 and rotates the root moves by n, so the
+        workers spread over different parts of the tree. Returns the result (as returned
+        by _search) of the worker that finished the deepest search, preferring the
+        lowest numbered worker."""
+        # the deadline is sent as wall clock time, since each process has its own clock
+        deadline = None if time_limit is None else time.time() + max(time_limit - _POOL_MARGIN, 0.0)
+        soft_deadline = None if soft_limit is None else time.time() + soft_limit
+
+        # the workers search without the moves made before, so only the position is sent
+        game = copy.copy(self._game)
+        game._undo_stack = []
+        tasks = [(game, depth, deadline, soft_deadline, self._tt.get_age(), worker)
+                 for worker in range(self._workers)]
+        results = self._pool.map(_smp_worker, tasks)
+        self._nodes = sum(result[-1] for result in results if result is not None)
+        best = None
+        for result in results:
+            if result is not None and (best is None or result[0] > best[0]):
+                best = result
+        return None if best is None else best[:3]
+
+    def _search_root(self, moves, depth):
+        """Method takes as parameters the list of moves for the player to move, best move
+        first, and a depth, and returns a tuple of the best of the moves at that depth
+        and its score."""
+        game = self._game
+        alpha = -MATE_SCORE - 1
+        best_move = moves[0]
+        for move in moves:
+            game._push(move[0], move[1])
+            score = -self._negamax(depth - 1, -MATE_SCORE - 1, -alpha, 1, move[0] != move[1])
+            game._pop()
+            if score > alpha:
+                alpha = score
+                best_move = move
+        self._tt.store(game.position_key(), depth, EXACT, alpha, best_move)
+        return best_move, alpha
+
+    def _negamax(self, depth, alpha, beta, ply, null_allowed=True, pass_allowed=True):
+        """Method takes as parameters the depth left to search, the alpha and beta bounds,
+        the number of moves made since the root, whether passing may be tried first (it
+        is not right after a pass) and whether passing is one of the moves searched, and
+        returns the score of the current position for the player to move. Scores outside
+        of the bounds are only bounds on the true score. Without passing, the score only
+        counts the other moves, so it is neither taken from nor stored in the
+        transposition table, and a player with no other move scores as checkmated."""
+        if depth <= 0:
+            return self._quiesce(alpha, beta, ply)
+        game = self._game
+        self._visit()
+        player = game.get_player_turn()
+        opponent = 'red' if player == 'blue' else 'blue'
+
+        # a stored result for the position may settle it, or at least give a move to try first
+        key = game.position_key()
+        entry = self._tt.probe(key)
+        tt_move = None
+        if entry is not None:
+            entry_depth, bound, score, tt_move = entry
+            score = _score_from_table(score, ply)
+            if entry_depth >= depth and pass_allowed:
+                if bound == EXACT:
+                    return score
+                if bound == LOWER and score >= beta:
+                    return score
+                if bound == UPPER and score <= alpha:
+                    return score
+
+        # passing is a legal move, so if the opponent cannot make use of a pass even with
+        # a shallower search, the position is good enough to cut off. With only a few
+        # weak pieces left the shallower search is less reliable, so the cutoff is first
+        # checked by searching the position itself to the same reduced depth without
+        # passing, since a pass would only repeat the search that just cut off
+        in_check = game.is_in_check(player)
+        if null_allowed and not in_check and depth >= _NULL_MIN_DEPTH and abs(beta) < _MATE_BOUND:
+            reduction = _NULL_REDUCTION + (depth >= _NULL_DEEP_DEPTH)
+            gen_sq = game._get_gen_index(player)
+            game._push(gen_sq, gen_sq)
+            score = -self._negamax(depth - 1 - reduction, -beta, -beta + 1, ply + 1, False)
+            game._pop()
+            if score >= beta:
+                if not self._is_endgame(player):
+                    return beta
+                if self._negamax(depth - reduction, beta - 1, beta, ply, False, False) >= beta:
+                    return beta
+
+        moves = self._moves(player, in_check, pass_allowed)
+        self._add_work(len(moves))
+        moves = self._ordered_moves(moves, tt_move, ply)
+        if not moves:
+            return -MATE_SCORE + ply
+        board = game._game_board
+        killers = self._killers[ply] if ply <= MAX_DEPTH else (None, None)
+
+        original_alpha = alpha
+        best_score = -MATE_SCORE - 1
+        best_move = None
+        for index, move in enumerate(moves):
+            current_sq, move_sq = move
+            quiet = (board[move_sq] is None and current_sq != move_sq and move != tt_move
+                     and move not in killers)
+            game._push(current_sq, move_sq)
+
+            # late quiet moves are searched less deeply with a null window first, and only
+            # searched in full if they beat alpha
+            if (quiet and index >= _LMR_MIN_MOVES and depth >= _LMR_MIN_DEPTH and not in_check
+                    and not game.is_in_check(opponent)):
+                reduction = 1 + (index >= _LMR_LATE_MOVES and depth > _LMR_MIN_DEPTH)
+                score = -self._negamax(depth - 1 - reduction, -alpha - 1, -alpha, ply + 1)
+                if score > alpha:
+                    score = -self._negamax(depth - 1, -beta, -alpha, ply + 1)
+            else:
+                score = -self._negamax(depth - 1, -beta, -alpha, ply + 1, current_sq != move_sq)
+            game._pop()
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        if board[move[1]] is None and move[0] != move[1]:
+                            self._store_cutoff(move, depth, ply)
+                        break
+
+        if best_score >= beta:
+            bound = LOWER
+        elif best_score > original_alpha:
+            bound = EXACT
+        else:
+            bound = UPPER
+        if pass_allowed:
+            self._tt.store(key, depth, bound, _score_to_table(best_score, ply), best_move)
+        return best_score
+
+    def _quiesce(self, alpha, beta, ply):
+        """Method takes as parameters the alpha and beta bounds and the number of moves
+        made since the root, and returns the score of the current position for the player
+        to move once the captures available have been played out. The player may stand
+        pat on the static evaluation instead of capturing, unless they are in check, in
+        which case every move is searched. Captures that lose material in a static
+        exchange are skipped."""
+        game = self._game
+        self._visit()
+        player = game.get_player_turn()
+        board = game._game_board
+
+        if game.is_in_check(player):
+            moves = list(game._legal_moves(player))
+            self._add_work(len(moves))
+            moves = self._ordered_moves(moves, None, ply)
+            if not moves:
+                return -MATE_SCORE + ply
+            best_score = -MATE_SCORE - 1
+        else:
+            best_score = game.evaluate()
+            if best_score >= beta:
+                return best_score
+            alpha = max(alpha, best_score)
+            moves = list(game._legal_moves(player))
+            self._add_work(len(moves))
+            moves = [move for move in moves if board[move[1]] is not None and self._see(move[0], move[1]) >= 0]
+            moves = self._ordered_moves(moves, None, ply)
+
+        for move in moves:
+            game._push(move[0], move[1])
+            score = -self._quiesce(-beta, -alpha, ply + 1)
+            game._pop()
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best_score
+
+    def _see(self, current_sq, move_sq):
+        """Method takes as parameters the squares of a capture, and returns the material
+        the capturing player wins (or loses, if negative) once each side has captured back
+        on the square for as long as it pays, always with its least valuable attacker.
+        The captures are made on the board and taken back afterwards, so pieces that stop
+        blocking a Chariot or start or stop screening a Cannon change the attackers as
+        they do in the game. A General only captures if the square is no longer
+        attacked."""
+        game = self._game
+        board = game._game_board
+        gains = [PIECE_VALUES[type(board[move_sq])]]
+        game._push(current_sq, move_sq)
+        made = 1
+        while True:
+            player = game.get_player_turn()
+            attackers = game._attackers(move_sq, player)
+            if not attackers:
+                break
+            attacker = min(attackers, key=lambda square: _SEE_VALUES[type(board[square])])
+            gains.append(PIECE_VALUES[type(board[move_sq])] - gains[-1])
+            game._push(attacker, move_sq)
+            made += 1
+            if type(board[move_sq]) is General and game._is_attacked(move_sq, game.get_player_turn()):
+                game._pop()
+                made -= 1
+                gains.pop()
+                break
+        for capture in range(made):
+            game._pop()
+        self._add_work(made)
+
+        # each side only makes its capture if it gains more than stopping before it
+        for index in range(len(gains) - 1, 0, -1):
+            gains[index - 1] = -max(-gains[index - 1], gains[index])
+        return gains[0]
+
+    def _visit(self):
+        """Method takes no parameters and counts a position visited by the search, as a
+        position and as a unit of work (see _add_work)."""
+        self._nodes += 1
+        self._work += 1
+        if self._work >= self._next_clock_read:
+            self._read_clock()
+
+    def _add_work(self, units):
+        """Method takes as a parameter a number of units of work done by the search
+        besides visiting positions (moves generated or captures tried in a static
+        exchange), and counts them, reading the clock once enough units have been
+        counted since the last read."""
+        self._work += units
+        if self._work >= self._next_clock_read:
+            self._read_clock()
+
+    def _read_clock(self):
+        """Method takes no parameters and raises SearchTimeout once the search has run
+        past its deadline or has been told to stop. Otherwise it sets the number of units
+        of work to count before the clock is read again, so that at the slowest time per
+        unit seen in the search so far it is read about every _CLOCK_PERIOD seconds."""
+        now = time.perf_counter()
+        if self._deadline is not None and now >= self._deadline:
+            raise SearchTimeout
+        if self._stop is not None and self._stop.is_set():
+            raise SearchTimeout
+        work = self._work - self._clock_work
+        if work:
+            self._unit_time = max(self._unit_time, (now - self._clock_time) / work)
+        interval = int(_CLOCK_PERIOD / self._unit_time) if self._unit_time else 2 * work
+        self._clock_work = self._work
+        self._clock_time = now
+        self._next_clock_read = self._work + max(interval, 1)
+
+    def _moves(self, player, in_check=None, passes=True):
+        """Method takes as parameters a player color and optionally whether the player
+        is in check and whether to include passing, and returns a list of the player's
+        legal moves as pairs of square indices, with passing last if it is included and
+        the player is not in check. A player with no moves (passing included) is
+        checkmated."""
+        game = self._game
+        moves = list(game._legal_moves(player))
+        if not passes:
+            return moves
+        if in_check is None:
+            in_check = game.is_in_check(player)
+        if not in_check:
+            gen_sq = game._get_gen_index(player)
+            moves.append((gen_sq, gen_sq))
+        return moves
+
+    def _ordered_moves(self, moves, first_move, ply):
+        """Method takes as parameters a list of moves, a move to search first (or None)
+        and the number of moves made since the root, and returns the list sorted into
+        the order the moves should be searched in. Captures are ordered by the most
+        valuable victim, and then by the least valuable attacker."""
+        board = self._game._game_board
+        killers = self._killers[ply] if ply <= MAX_DEPTH else (None, None)
+        history = self._history
+
+        def order(move):
+            current_sq, move_sq = move
+            if move == first_move:
+                return _ORDER_TT_MOVE
+            victim = board[move_sq]
+            if current_sq == move_sq:
+                return -1
+            if victim is not None:
+                return _ORDER_CAPTURE + PIECE_VALUES[type(victim)] * 10000 - PIECE_VALUES[type(board[current_sq])]
+            if move == killers[0]:
+                return _ORDER_KILLER + 1
+            if move == killers[1]:
+                return _ORDER_KILLER
+            return history[current_sq * 90 + move_sq]
+
+        moves.sort(key=order, reverse=True)
+        return moves
+
+    def _is_endgame(self, player):
+        """Method takes as a parameter a player color and returns True if the player has
+        no Chariots, Cannons or Horses left, where a shallower search after a pass is
+        least to be trusted."""
+        piece_squares = self._game._piece_squares
+        for piece_type in (Chariot, Cannon, Horse):
+            if piece_squares.get(piece_type(player)):
+                return False
+        return True
+
+    def _store_cutoff(self, move, depth, ply):
+        """Method takes as parameters a quiet move that caused a beta cutoff, the depth
+        it was searched at and the number of moves made since the root. The move becomes
+        the first killer move of the ply, and its history score grows with the square of
+        the depth, so cutoffs near the root count for more."""
+        if ply <= MAX_DEPTH:
+            killers = self._killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+        index = move[0] * 90 + move[1]
+        self._history[index] = min(self._history[index] + depth * depth, _ORDER_KILLER - 1)
+
+
+# the shared transposition table and engine of each Lazy SMP worker process
+_smp_tt = None
+_smp_engine = None
+
+
+def analyse(game, depth=None, multipv=1, time_limit=None, engine=None):
+    """Function takes as parameters a JanggiGame, optionally the number of moves to search
+    ahead, the number of best moves to report, a time limit in seconds and a JanggiEngine
+    for the game whose transposition table should be reused, and returns the analysis of
+    the game's position as returned by JanggiEngine.analyse."""
+    if engine is None:
+        engine = JanggiEngine(game)
+    return engine.analyse(depth, multipv, time_limit)
+
+
+def _smp_worker_start(tt_name):
+    """Function takes as a parameter the name of the shared memory holding the
+    transposition table, and opens the table when a worker process starts."""
+    global _smp_tt
+    _smp_tt = TranspositionTable(name=tt_name)
+
+
+def _smp_worker(task):
+    """Function takes as a parameter a tuple of (game, depth, wall clock deadline or None,
+    wall clock soft deadline or None, age of the search, worker number), searches the
+    game's position in the worker process and returns the result of _search with the
+    number of positions visited added to the end."""
+    global _smp_engine
+    game, depth, deadline, soft_deadline, age, worker = task
+    if _smp_engine is None:
+        _smp_engine = JanggiEngine(game, tt=_smp_tt)
+    _smp_engine._game = game
+    _smp_tt.set_age(age)
+    clock_offset = time.perf_counter() - time.time()
+    local_deadline = None if deadline is None else deadline + clock_offset
+    local_soft_deadline = None if soft_deadline is None else soft_deadline + clock_offset
+    result = _smp_engine._search(depth, local_deadline, 1 + worker % 2, worker, local_soft_deadline)
+    if result is None:
+        return None
+    return result + (_smp_engine.get_nodes(),)
+
+
+def _score_to_table(score, ply):
+    """Function takes as parameters a score and the number of moves since the root, and
+    returns the score to store in the transposition table. Mate scores are stored as
+    moves to mate from the position itself, so they hold wherever it is reached."""
+    if score > _MATE_BOUND:
+        return score + ply
+    if score < -_MATE_BOUND:
+        return score - ply
+    return score
+
+
+def _score_from_table(score, ply):
+    """Function takes as parameters a score from the transposition table and the number
+    of moves since the root, and returns the score as seen from the root."""
+    if score > _MATE_BOUND:
+        return score - ply
+    if score < -_MATE_BOUND:
+        return score + ply
+    return score
@@ -0,0 +1,113 @@
+# Description: This file contains the tables used to evaluate Janggi positions: the value
+# of each type of piece, and a piece-square table for each type of piece that adds a
+# bonus or penalty for the square it stands on. Scores are in hundredths of a point. The
+# tables are written from blue's side of the board, with row 1 (red's back row) first,
+# and are mirrored top to bottom for red. JanggiGame adds up the scores of the pieces on
+# the board as they move, so a position is evaluated without looking at the board.
+
+# value of each type of piece, by the name of its class
+PIECE_VALUES = {'General': 0, 'Guard': 300, 'Horse': 500, 'Elephant': 300, 'Chariot': 1300,
+                'Cannon': 700, 'Soldier': 200}
+
+# points given to red, who moves second, in the official point count
+DEOM = 150
+
+# piece-square tables, one row of columns a-i for each of rows 1-10
+PIECE_SQUARE_TABLES = {
+    'General': (
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, -10, -5, -10, 0, 0, 0),
+        (0, 0, 0, -5, 10, -5, 0, 0, 0),
+        (0, 0, 0, 0, 5, 0, 0, 0, 0),
+    ),
+    'Guard': (
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 5, 0, 0, 0, 0),
+        (0, 0, 0, 5, 10, 5, 0, 0, 0),
+        (0, 0, 0, 5, 0, 5, 0, 0, 0),
+    ),
+    'Horse': (
+        (0, 0, 5, 5, 5, 5, 5, 0, 0),
+        (0, 10, 15, 20, 15, 20, 15, 10, 0),
+        (5, 15, 20, 25, 25, 25, 20, 15, 5),
+        (5, 15, 25, 30, 30, 30, 25, 15, 5),
+        (0, 10, 20, 25, 25, 25, 20, 10, 0),
+        (0, 10, 15, 20, 20, 20, 15, 10, 0),
+        (0, 5, 10, 15, 10, 15, 10, 5, 0),
+        (-5, 0, 5, 5, 0, 5, 5, 0, -5),
+        (-10, -5, 0, 0, -10, 0, 0, -5, -10),
+        (-15, -10, -5, -5, -10, -5, -5, -10, -15),
+    ),
+    'Elephant': (
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 5, 5, 5, 5, 5, 5, 5, 0),
+        (0, 5, 10, 10, 10, 10, 10, 5, 0),
+        (0, 5, 10, 15, 15, 15, 10, 5, 0),
+        (0, 5, 10, 15, 15, 15, 10, 5, 0),
+        (0, 5, 10, 10, 15, 10, 10, 5, 0),
+        (0, 0, 5, 10, 10, 10, 5, 0, 0),
+        (-5, 0, 0, 5, 0, 5, 0, 0, -5),
+        (-10, -5, 0, 0, 0, 0, 0, -5, -10),
+    ),
+    'Chariot': (
+        (10, 10, 10, 20, 20, 20, 10, 10, 10),
+        (15, 20, 20, 30, 40, 30, 20, 20, 15),
+        (10, 15, 15, 25, 30, 25, 15, 15, 10),
+        (10, 15, 15, 20, 20, 20, 15, 15, 10),
+        (5, 10, 10, 15, 15, 15, 10, 10, 5),
+        (5, 10, 10, 15, 15, 15, 10, 10, 5),
+        (0, 5, 5, 10, 10, 10, 5, 5, 0),
+        (0, 5, 5, 10, 10, 10, 5, 5, 0),
+        (-5, 0, 0, 5, 5, 5, 0, 0, -5),
+        (-10, 0, 0, 5, 0, 5, 0, 0, -10),
+    ),
+    'Cannon': (
+        (0, 0, 0, 10, 15, 10, 0, 0, 0),
+        (0, 0, 0, 10, 20, 10, 0, 0, 0),
+        (0, 5, 5, 10, 15, 10, 5, 5, 0),
+        (0, 5, 5, 5, 10, 5, 5, 5, 0),
+        (0, 0, 0, 5, 5, 5, 0, 0, 0),
+        (0, 0, 0, 5, 5, 5, 0, 0, 0),
+        (0, 0, 0, 0, 5, 0, 0, 0, 0),
+        (0, 5, 5, 10, 15, 10, 5, 5, 0),
+        (0, 0, 0, 10, 20, 10, 0, 0, 0),
+        (0, 0, 0, 5, 10, 5, 0, 0, 0),
+    ),
+    'Soldier': (
+        (0, 0, 0, 20, 30, 20, 0, 0, 0),
+        (10, 20, 30, 50, 60, 50, 30, 20, 10),
+        (10, 20, 30, 50, 60, 50, 30, 20, 10),
+        (10, 20, 30, 40, 40, 40, 30, 20, 10),
+        (5, 10, 20, 30, 30, 30, 20, 10, 5),
+        (0, 5, 10, 15, 20, 15, 10, 5, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+    ),
+}
+
+
+def square_scores(piece_name, player):
+    """Function takes as parameters the name of a type of piece (the name of its class)
+    and a player color, and returns a tuple of the score of a piece of that type and
+    player on each square of the board (by index), which is its value plus the bonus
+    from its piece-square table. Red's scores are the table mirrored top to bottom."""
+    table = PIECE_SQUARE_TABLES[piece_name]
+    if player == 'red':
+        table = table[::-1]
+    value = PIECE_VALUES[piece_name]
+    return tuple(value + bonus for row in table for bonus in row)
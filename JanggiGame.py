@@ -6,6 +6,225 @@
 # ways to capture the other players pieces. The goal of the game is to put the opposing
 # player's general piece into checkmate.
 
+import multiprocessing
+import os
+import random
+import time
+
+import JanggiEval
+
+# algebraic names of the 90 squares on the board. Internally the board is a flat list
+# where the square in column c and row r (both counted from 1) is at (r - 1) * 9 + (c - 1)
+SQUARES = tuple(chr(col + 96) + str(row) for row in range(1, 11) for col in range(1, 10))
+SQUARE_INDEX = {name: index for index, name in enumerate(SQUARES)}
+
+# indices of the palace squares, used by the palace move rules of each piece
+(_D1, _E1, _F1, _D2, _E2, _F2, _D3, _E3, _F3,
+ _D8, _E8, _F8, _D9, _E9, _F9, _D10, _E10, _F10) = (
+    SQUARE_INDEX[col + str(row)] for row in (1, 2, 3, 8, 9, 10) for col in 'def')
+
+# squares inside each palace (fortress), shared by every Piece
+_BLUE_PALACE = frozenset((_D8, _D9, _D10, _E8, _E9, _E10, _F8, _F9, _F10))
+_RED_PALACE = frozenset((_D1, _D2, _D3, _E1, _E2, _E3, _F1, _F2, _F3))
+_PALACES = _BLUE_PALACE | _RED_PALACE
+
+
+def offset_square(square, col_step, row_step):
+    """Function takes as parameters the index of a square on the game board and the
+    number of columns and rows to step away from it. Returns the index of the square
+    that is reached, or None if the step would leave the game board."""
+    row, col = divmod(square, 9)
+    col += col_step
+    row += row_step
+    if 0 <= col < 9 and 0 <= row < 10:
+        return row * 9 + col
+    return None
+
+
+def _palace_center(square):
+    """Function takes as a parameter the index of a square on the game board and
+    returns the index of the center of the palace containing that square, or None if
+    the square is not inside either palace."""
+    row, col = divmod(square, 9)
+    if 3 <= col <= 5:
+        if row <= 2:
+            return _E2
+        if row >= 7:
+            return _E9
+    return None
+
+
+# single steps along the lines of the board and along the diagonals of the palaces
+_ORTHOGONAL_STEPS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+_DIAGONAL_STEPS = ((-1, -1), (1, -1), (-1, 1), (1, 1))
+
+
+def _palace_diagonal_links(square):
+    """Function takes as a parameter the index of a square and returns a tuple of the
+    squares one diagonal step away along the lines drawn inside a palace. Only the
+    corners and the center of a palace have diagonal links."""
+    center = _palace_center(square)
+    links = []
+    if center is None:
+        return ()
+    for col_step, row_step in _DIAGONAL_STEPS:
+        link = offset_square(square, col_step, row_step)
+        if link is not None and _palace_center(link) == center and center in (square, link):
+            links.append(link)
+    return tuple(links)
+
+
+def _palace_moves(square, player):
+    """Function takes as parameters the index of a square and a player color and
+    returns a tuple of the squares a General or Guard of that player could step onto
+    from the square. Both pieces must stay inside their own palace."""
+    own_center = _E9 if player == 'blue' else _E2
+    moves = []
+    if _palace_center(square) != own_center:
+        return ()
+    for col_step, row_step in _ORTHOGONAL_STEPS:
+        move = offset_square(square, col_step, row_step)
+        if move is not None and _palace_center(move) == own_center:
+            moves.append(move)
+    return tuple(moves) + _PALACE_DIAGONALS[square]
+
+
+def _horse_moves(square):
+    """Function takes as a parameter the index of a square and returns a tuple of
+    (leg, destination) pairs for a Horse on that square. The leg is the square one
+    step away in a straight line, which must be empty for the Horse to move."""
+    moves = []
+    for col_step, row_step in _ORTHOGONAL_STEPS:
+        leg = offset_square(square, col_step, row_step)
+        if leg is None:
+            continue
+        for side in (-1, 1):
+            move = offset_square(leg, col_step + side * abs(row_step), row_step + side * abs(col_step))
+            if move is not None:
+                moves.append((leg, move))
+    return tuple(moves)
+
+
+def _elephant_moves(square):
+    """Function takes as a parameter the index of a square and returns a tuple of
+    (first leg, second leg, destination) triples for an Elephant on that square. Both
+    legs must be empty for the Elephant to move."""
+    moves = []
+    for col_step, row_step in _ORTHOGONAL_STEPS:
+        first_leg = offset_square(square, col_step, row_step)
+        if first_leg is None:
+            continue
+        for side in (-1, 1):
+            diag_col = col_step + side * abs(row_step)
+            diag_row = row_step + side * abs(col_step)
+            second_leg = offset_square(first_leg, diag_col, diag_row)
+            if second_leg is None:
+                continue
+            move = offset_square(second_leg, diag_col, diag_row)
+            if move is not None:
+                moves.append((first_leg, second_leg, move))
+    return tuple(moves)
+
+
+def _soldier_moves(square, player):
+    """Function takes as parameters the index of a square and a player color and
+    returns a tuple of the squares a Soldier of that player could step onto. Soldiers
+    step sideways or forward, and forward along the diagonals inside a palace."""
+    forward = -1 if player == 'blue' else 1
+    moves = []
+    for col_step, row_step in ((-1, 0), (1, 0), (0, forward)):
+        move = offset_square(square, col_step, row_step)
+        if move is not None:
+            moves.append(move)
+    for link in _PALACE_DIAGONALS[square]:
+        if link // 9 - square // 9 == forward:
+            moves.append(link)
+    return tuple(moves)
+
+
+def _rays(square):
+    """Function takes as a parameter the index of a square and returns a tuple of rays
+    for a Chariot or Cannon on that square. Each ray is a tuple of the squares in one
+    direction, ordered outward from the square, including the diagonal rays along the
+    lines drawn inside a palace."""
+    rays = []
+    for col_step, row_step in _ORTHOGONAL_STEPS:
+        ray = []
+        look_sq = offset_square(square, col_step, row_step)
+        while look_sq is not None:
+            ray.append(look_sq)
+            look_sq = offset_square(look_sq, col_step, row_step)
+        if ray:
+            rays.append(tuple(ray))
+    for link in _PALACE_DIAGONALS[square]:
+        ray = [link]
+        step = link - square
+        while ray[-1] + step in _PALACE_DIAGONALS[ray[-1]]:
+            ray.append(ray[-1] + step)
+        rays.append(tuple(ray))
+    return tuple(rays)
+
+
+# move tables for every square, built once when the module is imported
+_PALACE_DIAGONALS = tuple(_palace_diagonal_links(square) for square in range(90))
+_PALACE_MOVES = {player: tuple(_palace_moves(square, player) for square in range(90))
+                 for player in ('blue', 'red')}
+_HORSE_MOVES = tuple(_horse_moves(square) for square in range(90))
+_ELEPHANT_MOVES = tuple(_elephant_moves(square) for square in range(90))
+_SOLDIER_MOVES = {player: tuple(_soldier_moves(square, player) for square in range(90))
+                  for player in ('blue', 'red')}
+_RAYS = tuple(_rays(square) for square in range(90))
+
+
+def _reverse_moves(table):
+    """Function takes as a parameter a per-square table of moves, where each move is a
+    tuple of leg squares ending in its destination, and returns a per-square table of
+    the moves that reach each square. Each reversed move is a tuple of the square the
+    move starts from followed by its leg squares."""
+    reverse = [[] for square in range(90)]
+    for origin in range(90):
+        for move in table[origin]:
+            reverse[move[-1]].append((origin,) + move[:-1])
+    return tuple(tuple(moves) for moves in reverse)
+
+
+# attacker tables: the squares a piece could reach each square from, used to look
+# outward from a square for attackers instead of generating every opposing move
+_HORSE_ATTACKERS = _reverse_moves(_HORSE_MOVES)
+_ELEPHANT_ATTACKERS = _reverse_moves(_ELEPHANT_MOVES)
+_SOLDIER_ATTACKERS = {player: tuple(tuple(origin for origin in range(90)
+                                          if square in _SOLDIER_MOVES[player][origin])
+                                    for square in range(90))
+                      for player in ('blue', 'red')}
+
+
+def _ray_attacks(board, rays, chariot, cannon, target_is_cannon):
+    """Function takes as parameters a board (a flat list of squares), rays of squares
+    leading out from a target square, the Chariot and Cannon of the attacking player and
+    whether the target is a Cannon, and lazily yields a tuple for each of those pieces
+    attacking the target along the rays: the piece's square, the squares of the ray up to
+    and including it, and the square of the screen for a Cannon (None for a Chariot)."""
+    # along each ray, a chariot attacks from the first piece, and a cannon attacks from
+    # the second piece if the first (the screen) is not a cannon, and the target is not a
+    # cannon either
+    for ray in rays:
+        screen = None
+        for index, look_sq in enumerate(ray):
+            look_piece = board[look_sq]
+            if look_piece is None:
+                continue
+            if screen is None:
+                if look_piece is chariot:
+                    yield look_sq, ray[:index + 1], None
+                elif type(look_piece) is Cannon:
+                    break
+                screen = look_sq
+            else:
+                if look_piece is cannon and not target_is_cannon:
+                    yield look_sq, ray[:index + 1], screen
+                break
+
+
 class JanggiGame:
     """Class represents the abstract board game Janggi. JanggiGame will keep track
     of the 9x10 game board, the positions of pieces on the game board, the current
@@ -21,33 +240,34 @@ class JanggiGame:
         """Initializes private data members for JanggiGame. Private data members
         include a representation of the game board and the pieces that are on it,
         current state of the game, which players turn it is currently, and the squares
-        where the blue and red Generals are located."""
+        where the blue and red Generals are located. The pieces still on the board are
+        also listed by player (square to piece) and by piece (piece to squares), so
+        they can be visited without looking at every square of the board. Every move
+        that is made is recorded on an undo stack so that it can be taken back."""
         self._game_state = 'UNFINISHED'
         self._player_turn = 'blue'
-        self._blue_gen_square = 'e9'
-        self._red_gen_square = 'e2'
-
-        # create empty game board (columns a-i, rows 1-10)
-        self._game_board = {
-            'a1': None, 'a2': None, 'a3': None, 'a4': None, 'a5': None,
-            'a6': None, 'a7': None, 'a8': None, 'a9': None, 'a10': None,
-            'b1': None, 'b2': None, 'b3': None, 'b4': None, 'b5': None,
-            'b6': None, 'b7': None, 'b8': None, 'b9': None, 'b10': None,
-            'c1': None, 'c2': None, 'c3': None, 'c4': None, 'c5': None,
-            'c6': None, 'c7': None, 'c8': None, 'c9': None, 'c10': None,
-            'd1': None, 'd2': None, 'd3': None, 'd4': None, 'd5': None,
-            'd6': None, 'd7': None, 'd8': None, 'd9': None, 'd10': None,
-            'e1': None, 'e2': None, 'e3': None, 'e4': None, 'e5': None,
-            'e6': None, 'e7': None, 'e8': None, 'e9': None, 'e10': None,
-            'f1': None, 'f2': None, 'f3': None, 'f4': None, 'f5': None,
-            'f6': None, 'f7': None, 'f8': None, 'f9': None, 'f10': None,
-            'g1': None, 'g2': None, 'g3': None, 'g4': None, 'g5': None,
-            'g6': None, 'g7': None, 'g8': None, 'g9': None, 'g10': None,
-            'h1': None, 'h2': None, 'h3': None, 'h4': None, 'h5': None,
-            'h6': None, 'h7': None, 'h8': None, 'h9': None, 'h10': None,
-            'i1': None, 'i2': None, 'i3': None, 'i4': None, 'i5': None,
-            'i6': None, 'i7': None, 'i8': None, 'i9': None, 'i10': None,
-        }
+        self._blue_gen_square = SQUARE_INDEX['e9']
+        self._red_gen_square = SQUARE_INDEX['e2']
+
+        # create empty game board (columns a-i, rows 1-10), indexed as described by SQUARES
+        self._game_board = [None] * 90
+        self._player_pieces = {'blue': {}, 'red': {}}
+        self._piece_squares = {}
+
+        # Zobrist key of the position (pieces on squares and player turn), updated as
+        # pieces are placed and moved
+        self._position_key = 0
+
+        # material (the value of each player's pieces) and evaluation (material plus
+        # piece-square bonuses) of each player, in hundredths of a point, updated as
+        # pieces are placed, moved and captured
+        self._material = {'blue': 0, 'red': 0}
+        self._evaluation = {'blue': 0, 'red': 0}
+
+        # each undo entry is a tuple of (square moved from, square moved onto, captured
+        # piece, previous square of the mover's general, previous turn, previous state,
+        # previous position key)
+        self._undo_stack = []
 
         # create blue pieces
         b_ch1 = Chariot('blue')
@@ -68,22 +288,22 @@ class JanggiGame:
         b_so5 = Soldier('blue')
 
         # place blue pieces on starting squares
-        self._game_board['a10'] = b_ch1
-        self._game_board['b10'] = b_el1
-        self._game_board['c10'] = b_ho1
-        self._game_board['d10'] = b_gu1
-        self._game_board['f10'] = b_gu2
-        self._game_board['g10'] = b_el2
-        self._game_board['h10'] = b_ho2
-        self._game_board['i10'] = b_ch2
-        self._game_board['e9'] = b_gen
-        self._game_board['b8'] = b_ca1
-        self._game_board['h8'] = b_ca2
-        self._game_board['a7'] = b_so1
-        self._game_board['c7'] = b_so2
-        self._game_board['e7'] = b_so3
-        self._game_board['g7'] = b_so4
-        self._game_board['i7'] = b_so5
+        self.set_square('a10', b_ch1)
+        self.set_square('b10', b_el1)
+        self.set_square('c10', b_ho1)
+        self.set_square('d10', b_gu1)
+        self.set_square('f10', b_gu2)
+        self.set_square('g10', b_el2)
+        self.set_square('h10', b_ho2)
+        self.set_square('i10', b_ch2)
+        self.set_square('e9', b_gen)
+        self.set_square('b8', b_ca1)
+        self.set_square('h8', b_ca2)
+        self.set_square('a7', b_so1)
+        self.set_square('c7', b_so2)
+        self.set_square('e7', b_so3)
+        self.set_square('g7', b_so4)
+        self.set_square('i7', b_so5)
 
         # create red pieces
         r_ch1 = Chariot('red')
@@ -104,22 +324,22 @@ class JanggiGame:
         r_so5 = Soldier('red')
 
         # place red pieces on starting squares
-        self._game_board['a1'] = r_ch1
-        self._game_board['b1'] = r_el1
-        self._game_board['c1'] = r_ho1
-        self._game_board['d1'] = r_gu1
-        self._game_board['f1'] = r_gu2
-        self._game_board['g1'] = r_el2
-        self._game_board['h1'] = r_ho2
-        self._game_board['i1'] = r_ch2
-        self._game_board['e2'] = r_gen
-        self._game_board['b3'] = r_ca1
-        self._game_board['h3'] = r_ca2
-        self._game_board['a4'] = r_so1
-        self._game_board['c4'] = r_so2
-        self._game_board['e4'] = r_so3
-        self._game_board['g4'] = r_so4
-        self._game_board['i4'] = r_so5
+        self.set_square('a1', r_ch1)
+        self.set_square('b1', r_el1)
+        self.set_square('c1', r_ho1)
+        self.set_square('d1', r_gu1)
+        self.set_square('f1', r_gu2)
+        self.set_square('g1', r_el2)
+        self.set_square('h1', r_ho2)
+        self.set_square('i1', r_ch2)
+        self.set_square('e2', r_gen)
+        self.set_square('b3', r_ca1)
+        self.set_square('h3', r_ca2)
+        self.set_square('a4', r_so1)
+        self.set_square('c4', r_so2)
+        self.set_square('e4', r_so3)
+        self.set_square('g4', r_so4)
+        self.set_square('i4', r_so5)
 
     def get_game_state(self):
         """Method takes no parameters and returns the state of the game. Possible
@@ -141,28 +361,46 @@ class JanggiGame:
         """Method takes the color of a player (string) as a parameter and sets the
         _player_turn private data member to that player. Players alternate taking turns,
         so this occurs everytime a player completes a valid turn."""
+        if player != self._player_turn:
+            self._position_key ^= _ZOBRIST_TURN
         self._player_turn = player
 
     def get_square(self, square):
-        """Method takes as a parameter a square on the game board (string) and if a
+        """Method takes as parameter a square on the game board (string) and if a
         Piece is occupying the square, it will return the Piece object. Otherwise,
         it will return None."""
-        return self._game_board[square]
+        return self._game_board[SQUARE_INDEX[square]]
 
     def set_square(self, square, piece=None):
         """Method will take as parameters a square on the game board (string) and a
         Piece for a specified player (optional parameter). If included, the Piece for
         that player will be placed onto the specified square. If the Piece parameter is
         not included, the square will be set to contain None."""
-        self._game_board[square] = piece
+        index = SQUARE_INDEX[square]
+        old_piece = self._game_board[index]
+        if old_piece is not None:
+            old_player = old_piece.get_player()
+            del self._player_pieces[old_player][index]
+            self._piece_squares[old_piece].discard(index)
+            self._position_key ^= _ZOBRIST_KEYS[old_piece][index]
+            self._material[old_player] -= _PIECE_VALUES[old_piece]
+            self._evaluation[old_player] -= _SQUARE_SCORES[old_piece][index]
+        if piece is not None:
+            player = piece.get_player()
+            self._player_pieces[player][index] = piece
+            self._piece_squares.setdefault(piece, set()).add(index)
+            self._position_key ^= _ZOBRIST_KEYS[piece][index]
+            self._material[player] += _PIECE_VALUES[piece]
+            self._evaluation[player] += _SQUARE_SCORES[piece][index]
+        self._game_board[index] = piece
 
     def get_gen_square(self, player):
         """Method takes as a parameter a player color and returns the square on
         the game board (string) where that player's General is currently located."""
         if player == 'blue':
-            return self._blue_gen_square
+            return SQUARES[self._blue_gen_square]
         if player == 'red':
-            return self._red_gen_square
+            return SQUARES[self._red_gen_square]
 
     def set_gen_square(self, player, new_gen_sq):
         """Method takes as parameters a player color and the new square on the board
@@ -170,90 +408,527 @@ class JanggiGame:
         updates the private data member for the player's General location, and it does
         not change the game board."""
         if player == 'blue':
-            self._blue_gen_square = new_gen_sq
+            self._blue_gen_square = SQUARE_INDEX[new_gen_sq]
         if player == 'red':
-            self._red_gen_square = new_gen_sq
+            self._red_gen_square = SQUARE_INDEX[new_gen_sq]
+
+    def get_pieces(self, player):
+        """Method takes as a parameter a player color and returns a dictionary of the
+        squares (strings) holding that player's pieces to the Piece on each square."""
+        return {SQUARES[square]: piece for square, piece in self._player_pieces[player].items()}
 
     def get_game_board(self):
-        """Method takes no parameters and returns the current state of the game board."""
-        return self._game_board
+        """Method takes no parameters and returns the current state of the game board
+        as a dictionary of squares (strings) to the Piece on each square, or None."""
+        return dict(zip(SQUARES, self._game_board))
+
+    def position_key(self):
+        """Method takes no parameters and returns a 64-bit Zobrist key (integer) for the
+        current position, which covers the pieces on each square and the player whose
+        turn it is. Equal positions have equal keys, so the key can be used to look
+        positions up in caches and tables or to find repeated positions."""
+        return self._position_key
+
+    def score(self, player):
+        """Method takes as a parameter a player color and returns that player's points
+        in the official Janggi point count: the value of their pieces still on the board
+        (chariot 13, cannon 7, horse 5, elephant 3, guard 3, soldier 2), plus 1.5 points
+        of deom for red, who moves second."""
+        points = self._material[player]
+        if player == 'red':
+            points += JanggiEval.DEOM
+        return points / 100
+
+    def evaluate(self):
+        """Method takes no parameters and returns the evaluation of the current position
+        for the player whose turn it is, in hundredths of a point: their material and
+        piece-square bonuses less their opponent's. The totals are updated by each move,
+        so this does not look at the board."""
+        if self._player_turn == 'blue':
+            return self._evaluation['blue'] - self._evaluation['red']
+        return self._evaluation['red'] - self._evaluation['blue']
+
+    def _get_gen_index(self, player):
+        """Method takes as a parameter a player color and returns the index of the
+        square where that player's General is currently located."""
+        if player == 'blue':
+            return self._blue_gen_square
+        return self._red_gen_square
+
+    def _set_gen_index(self, player, new_gen_index):
+        """Method takes as parameters a player color and the index of the square the
+        General for that player has moved onto, and updates the General location."""
+        if player == 'blue':
+            self._blue_gen_square = new_gen_index
+        else:
+            self._red_gen_square = new_gen_index
+
+    def _push(self, current_sq, move_sq):
+        """Method takes as parameters the indices of the square a piece is moving from
+        and the square it is moving onto, and makes the move without checking that it
+        is valid. Moving a piece onto its own square passes the turn. The board, piece
+        lists, General locations, player turn, position key, material and evaluation are
+        updated, and an entry recording what the move changed is pushed onto the undo
+        stack."""
+        board = self._game_board
+        piece = board[current_sq]
+        captured = board[move_sq]
+        player = piece.get_player()
+        key = self._position_key
+        self._undo_stack.append((current_sq, move_sq, captured, self._get_gen_index(player),
+                                 self._player_turn, self._game_state, key))
+        next_player = 'red' if player == 'blue' else 'blue'
+        if next_player != self._player_turn:
+            key ^= _ZOBRIST_TURN
+        self._player_turn = next_player
+        if current_sq == move_sq:
+            self._position_key = key
+            return
+        piece_keys = _ZOBRIST_KEYS[piece]
+        key ^= piece_keys[current_sq] ^ piece_keys[move_sq]
+        piece_scores = _SQUARE_SCORES[piece]
+        self._evaluation[player] += piece_scores[move_sq] - piece_scores[current_sq]
+        if captured is not None:
+            captured_player = captured.get_player()
+            del self._player_pieces[captured_player][move_sq]
+            self._piece_squares[captured].discard(move_sq)
+            key ^= _ZOBRIST_KEYS[captured][move_sq]
+            self._material[captured_player] -= _PIECE_VALUES[captured]
+            self._evaluation[captured_player] -= _SQUARE_SCORES[captured][move_sq]
+        self._position_key = key
+        player_pieces = self._player_pieces[player]
+        del player_pieces[current_sq]
+        player_pieces[move_sq] = piece
+        squares = self._piece_squares[piece]
+        squares.discard(current_sq)
+        squares.add(move_sq)
+        board[move_sq] = piece
+        board[current_sq] = None
+        if type(piece) is General:
+            self._set_gen_index(player, move_sq)
+
+    def _pop(self):
+        """Method takes no parameters, pops the most recent entry from the undo stack
+        and takes back the move it recorded, restoring the board, piece lists, General
+        locations, player turn, game state, position key, material and evaluation.
+        Returns the indices of the squares the move was made from and onto."""
+        current_sq, move_sq, captured, gen_sq, turn, state, key = self._undo_stack.pop()
+        board = self._game_board
+        piece = board[move_sq]
+        self._player_turn = turn
+        self._game_state = state
+        self._position_key = key
+        if current_sq == move_sq:
+            return current_sq, move_sq
+        player = piece.get_player()
+        player_pieces = self._player_pieces[player]
+        del player_pieces[move_sq]
+        player_pieces[current_sq] = piece
+        squares = self._piece_squares[piece]
+        squares.discard(move_sq)
+        squares.add(current_sq)
+        board[current_sq] = piece
+        board[move_sq] = captured
+        piece_scores = _SQUARE_SCORES[piece]
+        self._evaluation[player] -= piece_scores[move_sq] - piece_scores[current_sq]
+        if captured is not None:
+            captured_player = captured.get_player()
+            self._player_pieces[captured_player][move_sq] = captured
+            self._piece_squares[captured].add(move_sq)
+            self._material[captured_player] += _PIECE_VALUES[captured]
+            self._evaluation[captured_player] += _SQUARE_SCORES[captured][move_sq]
+        self._set_gen_index(player, gen_sq)
+        return current_sq, move_sq
+
+    def push_move(self, current_sq, move_sq):
+        """Method takes as parameters the square a piece is moving from and the square
+        it is moving onto (strings), and makes the move for the player who owns the
+        piece without checking that it is legal, so that search and analysis can
+        explore variations in place. The game state is not updated. Every push_move
+        must be matched by a pop_move before the game continues with make_move."""
+        self._push(SQUARE_INDEX[current_sq], SQUARE_INDEX[move_sq])
+
+    def pop_move(self):
+        """Method takes no parameters and takes back the most recent move made with
+        make_move or push_move, restoring the board, player turn and game state to how
+        they were before it. Returns the squares (strings) the move was made from and
+        onto, or None if there are no moves to take back."""
+        if not self._undo_stack:
+            return None
+        current_sq, move_sq = self._pop()
+        return SQUARES[current_sq], SQUARES[move_sq]
+
+    def _is_attacked(self, square, player):
+        """Method takes as parameters the index of a square and a player color, and
+        returns True if one of that player's pieces could move onto the square on its
+        next move. It stops at the first attacker found by _scan_attackers."""
+        for attacker in self._scan_attackers(square, player):
+            return True
+        return False
+
+    def _attackers(self, square, player):
+        """Method takes as parameters the index of a square and a player color, and
+        returns a list of the squares of that player's pieces that could move onto the
+        square on their next move (ignoring whether the move would leave their General
+        in check), as found by _scan_attackers."""
+        return [origin for origin, path, screen in self._scan_attackers(square, player)]
+
+    def _scan_attackers(self, square, player):
+        """Method takes as parameters the index of a square and a player color, and
+        lazily yields a tuple for each of that player's pieces that could move onto the
+        square on its next move (ignoring whether the move would leave their General in
+        check). Each tuple holds the square of the piece, the squares another piece could
+        move onto to stop the attack (the piece's own square, the squares between it and
+        the target, and its Horse or Elephant legs), and the square of the screen for a
+        Cannon (None for other pieces). Instead of generating the player's moves, this
+        looks outward from the square along the Chariot and Cannon rays and the Horse,
+        Elephant, Soldier and palace move patterns."""
+        board = self._game_board
+        pieces = _PIECES[player]
+
+        # soldiers, and the general and guards within their palace, step onto the square
+        soldier = pieces[Soldier]
+        for origin in _SOLDIER_ATTACKERS[player][square]:
+            if board[origin] is soldier:
+                yield origin, (origin,), None
+        general = pieces[General]
+        guard = pieces[Guard]
+        for origin in _PALACE_MOVES[player][square]:
+            if board[origin] is general or board[origin] is guard:
+                yield origin, (origin,), None
+
+        # horses and elephants reach the square if their legs are empty
+        horse = pieces[Horse]
+        for origin, leg in _HORSE_ATTACKERS[square]:
+            if board[origin] is horse and board[leg] is None:
+                yield origin, (origin, leg), None
+        elephant = pieces[Elephant]
+        for origin, first_leg, second_leg in _ELEPHANT_ATTACKERS[square]:
+            if board[origin] is elephant and board[first_leg] is None and board[second_leg] is None:
+                yield origin, (origin, first_leg, second_leg), None
+
+        chariot = pieces[Chariot]
+        cannon = pieces[Cannon]
+        if not self._piece_squares.get(chariot) and not self._piece_squares.get(cannon):
+            return
+        yield from _ray_attacks(board, _RAYS[square], chariot, cannon, type(board[square]) is Cannon)
 
     def is_in_check(self, player):
         """Method takes as a parameter a player color and returns True if that
         player is in check. Otherwise, returns False. Check occurs when a player's
         General could be taken by an opposing player's Piece on it's next move."""
-        temp_board = self.get_game_board()
-        all_opponent_moves = []
-        player_gen_sq = self.get_gen_square(player)
-
-        # create list of all moves the opposing player could make
-        for square in temp_board:
-            if temp_board[square] is not None:
-                if temp_board[square].get_player() != player:
-                    opp_moves = temp_board[square].check_move(square, temp_board)
-                    all_opponent_moves = all_opponent_moves + opp_moves
-
-        # check if current player's general could be attacked by an opponent piece
-        if player_gen_sq in all_opponent_moves:
-            return True
-        else:
-            return False
+        opponent = 'red' if player == 'blue' else 'blue'
+        return self._is_attacked(self._get_gen_index(player), opponent)
 
     def is_checkmate(self, player):
         """Method takes as a parameter a player color and returns True if they
         are in checkmate and have lost the game. Returns false if the player is
         still in check, but a valid move exists to get them out of check."""
-        temp_board = self.get_game_board()
-
-        # for each of the current player's pieces, look at all possible moves
-        for square in temp_board:
-            if temp_board[square] is not None:
-                if temp_board[square].get_player() == player:
-                    possible_moves = temp_board[square].check_move(square, temp_board)
-
-                    # for each move a piece could make, determine if it would end check
-                    for move in possible_moves:
-                        if square != move:
-                            if self.try_move(square, move) is True:
-                                return False
+        # legal moves are generated one at a time, so the first one found ends the search
+        for move in self._legal_moves(player):
+            return False
 
         # no moves exist that could take the player out of check
         return True
 
+    def _legal_moves(self, player, pieces=None):
+        """Method takes as parameters a player color and optionally a list of (square,
+        piece) pairs to move (by default, all of the player's pieces), and lazily yields
+        each legal move (other than passing) for those pieces as a pair of square
+        indices. A move is legal if it is valid for the piece and does not leave the
+        player in check. The caller may make and take back moves between the moves that
+        are yielded."""
+        board = self._game_board
+        general = _PIECES[player][General]
+
+        # the pieces are copied into a list, since trying moves updates the piece lists
+        if pieces is None:
+            pieces = list(self._player_pieces[player].items())
+
+        # while in check, only the moves that could resolve the check are tried
+        if self.is_in_check(player):
+            yield from self._evasions(player, pieces)
+            return
+
+        # otherwise only moves onto or off the lines and legs that lead to the General
+        # can expose it, so the pins are found once and all other moves are legal
+        lines, legs = self._find_pins(player)
+        for square, piece in pieces:
+            if piece is general:
+                for move in piece.check_move(square, board):
+                    if move != square and self._is_safe_move(square, move):
+                        yield square, move
+                continue
+            from_lines = lines.get(square, ())
+            from_legs = legs.get(square, ())
+            for move in piece.check_move(square, board):
+                if move == square:
+                    continue
+                to_lines = lines.get(move, ())
+                if not (from_lines or from_legs or to_lines):
+                    yield square, move
+                elif not self._exposes_general(square, move, from_lines + to_lines, from_legs):
+                    yield square, move
+
+    def _evasions(self, player, pieces):
+        """Method takes as parameters the color of a player in check and a list of
+        (square, piece) pairs to move, and lazily yields each legal move for those
+        pieces as a pair of square indices. Besides General moves, only moves that
+        capture every checking piece or land between it and the General (including on
+        a Horse or Elephant leg), or that move a Cannon's screen away, can resolve the
+        check, so only those moves are tried."""
+        board = self._game_board
+        general = _PIECES[player][General]
+        checkers = self._find_checkers(player)
+        for square, piece in pieces:
+            for move in piece.check_move(square, board):
+                if move == square:
+                    continue
+                if piece is not general:
+                    for squares, screen in checkers:
+                        if move not in squares and square != screen:
+                            break
+                    else:
+                        if self._is_safe_move(square, move):
+                            yield square, move
+                elif self._is_safe_move(square, move):
+                    yield square, move
+
+    def _find_checkers(self, player):
+        """Method takes as a parameter a player color and returns a list with an entry
+        for each opposing piece that is attacking that player's General. Each entry is
+        a pair of a tuple of the squares a piece could move onto to stop that attack
+        (the attacker's square and the squares between it and the General, including
+        Horse and Elephant legs), and the square of the Cannon's screen for a Cannon
+        (None for other pieces)."""
+        opponent = 'red' if player == 'blue' else 'blue'
+        return [(path, screen) for origin, path, screen in self._scan_attackers(self._get_gen_index(player), opponent)]
+
+    def _find_pins(self, player):
+        """Method takes as a parameter a player color and finds the squares where a move
+        by that player could expose their General. Returns two dictionaries. The first
+        maps each square on a ray from the General up to the nearest opposing Chariot or
+        Cannon to a tuple of the rays through it. A piece leaving such a square can
+        unblock a Chariot or leave a Cannon with a single screen, and a piece arriving on
+        one can become the screen a Cannon needs. The second maps each leg square of an
+        opposing Horse or Elephant that would otherwise reach the General to a tuple of
+        (square of that piece, its other legs) pairs."""
+        board = self._game_board
+        gen_sq = self._get_gen_index(player)
+        opponent = 'red' if player == 'blue' else 'blue'
+        chariot = _PIECES[opponent][Chariot]
+        cannon = _PIECES[opponent][Cannon]
+        lines = {}
+        legs = {}
+
+        for ray in _RAYS[gen_sq]:
+            for end, look_sq in enumerate(ray):
+                if board[look_sq] is chariot or board[look_sq] is cannon:
+                    for line_sq in ray[:end + 1]:
+                        lines[line_sq] = lines.get(line_sq, ()) + (ray,)
+                    break
+
+        horse = _PIECES[opponent][Horse]
+        for origin, leg in _HORSE_ATTACKERS[gen_sq]:
+            if board[origin] is horse:
+                legs[leg] = legs.get(leg, ()) + ((origin, ()),)
+        elephant = _PIECES[opponent][Elephant]
+        for origin, first_leg, second_leg in _ELEPHANT_ATTACKERS[gen_sq]:
+            if board[origin] is elephant:
+                legs[first_leg] = legs.get(first_leg, ()) + ((origin, (second_leg,)),)
+                legs[second_leg] = legs.get(second_leg, ()) + ((origin, (first_leg,)),)
+
+        return lines, legs
+
+    def _exposes_general(self, current_sq, move_sq, rays, leg_attackers):
+        """Method takes as parameters the indices of the square a piece (other than a
+        General) is moving from and onto, the rays from its General that the move
+        touches and the opposing Horses and Elephants whose leg it is leaving, as found
+        by _find_pins. Returns True if the move would expose the General to an attack
+        along one of them. Only those rays and legs are looked at, with the board read
+        as it would be after the move, so the move is not made (only the two squares
+        are changed, and put back)."""
+        board = self._game_board
+        piece = board[current_sq]
+        opponent = 'red' if piece.get_player() == 'blue' else 'blue'
+        chariot = _PIECES[opponent][Chariot]
+        cannon = _PIECES[opponent][Cannon]
+
+        # the two squares are set as they would be after the move while the rays are read
+        captured = board[move_sq]
+        board[current_sq] = None
+        board[move_sq] = piece
+        exposed = False
+        for attack in _ray_attacks(board, rays, chariot, cannon, False):
+            exposed = True
+            break
+        board[move_sq] = captured
+        board[current_sq] = piece
+        if exposed:
+            return True
+
+        # a horse or elephant reaches the General once the leg is left, unless it was
+        # captured or its other leg is still (or becomes) blocked
+        for origin, other_legs in leg_attackers:
+            if origin == move_sq:
+                continue
+            for leg in other_legs:
+                if leg == move_sq or board[leg] is not None:
+                    break
+            else:
+                return True
+        return False
+
+    def _is_safe_move(self, current_sq, move_sq):
+        """Method takes as parameters the indices of the square a piece is moving from
+        and a square the piece can move onto, and returns True if making the move would
+        not leave the moving player in check."""
+        player = self._game_board[current_sq].get_player()
+        opponent = 'red' if player == 'blue' else 'blue'
+        self._push(current_sq, move_sq)
+        in_check = self._is_attacked(self._get_gen_index(player), opponent)
+        self._pop()
+        return not in_check
+
+    def legal_moves(self, player=None, passes=False):
+        """Method takes optional parameters of a player color (by default, the player
+        whose turn it is) and whether to include passing. It lazily yields each legal
+        move for that player as a pair of squares (strings) that make_move would accept,
+        so callers that only need some of the moves can stop early. If passes is True
+        and the player is not in check, passing is yielded last as the General's square
+        moving onto itself. No moves are yielded once the game has been won."""
+        if player is None:
+            player = self.get_player_turn()
+        if self.get_game_state() != 'UNFINISHED':
+            return
+        for current_sq, move_sq in self._legal_moves(player):
+            yield SQUARES[current_sq], SQUARES[move_sq]
+        if passes and not self.is_in_check(player):
+            gen_sq = self.get_gen_square(player)
+            yield gen_sq, gen_sq
+
+    def legal_moves_from(self, square):
+        """Method takes as a parameter a square (string) and lazily yields each square
+        (string) the piece on it could legally move onto, not including passing. Nothing
+        is yielded for an empty square or once the game has been won."""
+        current_sq = SQUARE_INDEX[square]
+        piece = self._game_board[current_sq]
+        if piece is None or self.get_game_state() != 'UNFINISHED':
+            return
+        for from_sq, move in self._legal_moves(piece.get_player(), [(current_sq, piece)]):
+            yield SQUARES[move]
+
+    def perft(self, depth, passes=False, workers=None):
+        """Method takes as parameters a depth, whether to include passing and optionally
+        a number of worker processes, and returns the number of move sequences of that
+        many moves (leaf nodes of the legal move tree) from the current position,
+        starting with the player whose turn it is. Passing is a legal move whenever the
+        player is not in check, but it is left out unless passes is True. The count is
+        used to test move generation and to measure its speed. If workers is given, the
+        root moves are shared out between that many processes (see perft_report)."""
+        if workers is not None:
+            return sum(nodes for worker, nodes, nodes_per_second in self.perft_report(depth, passes, workers))
+        if self.get_game_state() != 'UNFINISHED':
+            return 0
+        if depth <= 0:
+            return 1
+        return self._perft(self.get_player_turn(), depth, passes)
+
+    def perft_report(self, depth, passes=False, workers=None):
+        """Method takes as parameters a depth, whether to include passing and the number
+        of worker processes to use (by default, one per CPU). The perft count below each
+        root move is worked out by a pool of processes, which take root moves one at a
+        time until none are left. Returns a list with a tuple for each worker of (process
+        id, nodes counted, nodes per second), and the nodes add up to perft(depth)."""
+        player = self.get_player_turn()
+        if self.get_game_state() != 'UNFINISHED' or depth <= 1:
+            start_time = time.perf_counter()
+            nodes = self.perft(depth, passes)
+            return [(os.getpid(), nodes, nodes / max(time.perf_counter() - start_time, 1e-9))]
+
+        # each worker gets its own copy of the game when it starts, and is then sent moves
+        tasks = [(current_sq, move_sq, depth - 1, passes) for current_sq, move_sq in self._perft_moves(player, passes)]
+        totals = {}
+        with multiprocessing.Pool(workers or os.cpu_count(), _perft_worker_start, (self,)) as pool:
+            for worker, nodes, seconds in pool.imap_unordered(_perft_worker, tasks):
+                worker_nodes, worker_seconds = totals.get(worker, (0, 0.0))
+                totals[worker] = (worker_nodes + nodes, worker_seconds + seconds)
+        return [(worker, nodes, nodes / max(seconds, 1e-9)) for worker, (nodes, seconds) in totals.items()]
+
+    def perft_divide(self, depth, passes=False):
+        """Method takes as parameters a depth and whether to include passing, and returns
+        a dictionary of each legal move from the current position, as a pair of squares
+        (strings), to the perft count of the position after it at one less depth. The
+        counts add up to perft(depth), and comparing them move by move shows where two
+        move generators disagree."""
+        player = self.get_player_turn()
+        opponent = 'red' if player == 'blue' else 'blue'
+        divide = {}
+        if self.get_game_state() != 'UNFINISHED' or depth <= 0:
+            return divide
+        for current_sq, move_sq in self._perft_moves(player, passes):
+            self._push(current_sq, move_sq)
+            divide[SQUARES[current_sq], SQUARES[move_sq]] = self._perft(opponent, depth - 1, passes)
+            self._pop()
+        return divide
+
+    def _perft_moves(self, player, passes):
+        """Method takes as parameters a player color and whether to include passing, and
+        returns a list of the player's legal moves as pairs of square indices, with
+        passing (the General's square moving onto itself) last if it is included and
+        the player is not in check."""
+        moves = list(self._legal_moves(player))
+        if passes and not self.is_in_check(player):
+            gen_sq = self._get_gen_index(player)
+            moves.append((gen_sq, gen_sq))
+        return moves
+
+    def _perft(self, player, depth, passes):
+        """Method is the same as perft, but takes the player to move, and counts the
+        moves at the last depth without making them."""
+        if depth == 0:
+            return 1
+        moves = self._perft_moves(player, passes)
+        if depth == 1:
+            return len(moves)
+        opponent = 'red' if player == 'blue' else 'blue'
+        nodes = 0
+        for current_sq, move_sq in moves:
+            self._push(current_sq, move_sq)
+            nodes += self._perft(opponent, depth - 1, passes)
+            self._pop()
+        return nodes
+
     def try_move(self, try_current_sq, try_move_sq):
         """Method takes as parameters a square with a piece to try moving and a
-        square to try moving onto. Returns True if the player would no longer be in
-        check after trying the move. Returns False if the move would not take the
+        square to try moving onto (strings). Returns True if the player would no longer
+        be in check after trying the move. Returns False if the move would not take the
         player out of check. The method will also restore the game board and Pieces
         to the state they were in prior to the method being called."""
+        return self._try_move(SQUARE_INDEX[try_current_sq], SQUARE_INDEX[try_move_sq])
+
+    def _try_move(self, try_current_sq, try_move_sq):
+        """Method is the same as try_move, but takes the indices of the squares on the
+        game board instead of their algebraic names."""
+        board = self._game_board
         result = False
-        try_move_piece = self.get_square(try_move_sq)
-        if try_move_piece is not None:
-            try_move_player = try_move_piece.get_player()
-        try_current_piece = self.get_square(try_current_sq)
-        try_current_player = try_current_piece.get_player()
-        try_gen_location = self.get_gen_square(try_current_player)
+        try_move_piece = board[try_move_sq]
+        try_current_player = board[try_current_sq].get_player()
 
         # check if a piece of the same color as the player is in the move square
         if try_move_piece is not None:
-            if try_move_player == try_current_player:
+            if try_move_piece.get_player() == try_current_player:
                 return result
 
         # try making the move
-        self.set_square(try_move_sq, try_current_piece)
-        self.set_square(try_current_sq)
-        if type(try_current_piece) is General:
-            self.set_gen_square(try_current_player, try_move_sq)
+        self._push(try_current_sq, try_move_sq)
 
         # determine if the player is no longer in check and update result
         if self.is_in_check(try_current_player) is False:
             result = True
 
         # restore the board to previous state and return
-        self.set_square(try_current_sq, try_current_piece)
-        self.set_square(try_move_sq, try_move_piece)
-        if type(try_current_piece) is General:
-            self.set_gen_square(try_current_player, try_gen_location)
+        self._pop()
 
         return result
 
@@ -264,11 +939,18 @@ class JanggiGame:
         their turn. A valid move to a square where an opponent's Piece is located
         will result in the opponent's Piece being captured and removed from the game
         board, and the moving piece now occupying that square. Invalid moves will
-        return False and valid moves will return True. This method will utilize
-        JanggiGame get and set methods and Piece subclass methods."""
-        current_piece = self.get_square(current_sq)
-        current_game_board = self.get_game_board()
-        destination_piece = self.get_square(move_sq)
+        return False and valid moves will return True. Squares are converted from
+        algebraic notation to board indices here, and all other work is done on the
+        indices of the squares."""
+        # check if both squares are on the game board
+        current_index = SQUARE_INDEX.get(current_sq)
+        move_index = SQUARE_INDEX.get(move_sq)
+        if current_index is None or move_index is None:
+            return False
+
+        current_game_board = self._game_board
+        current_piece = current_game_board[current_index]
+        destination_piece = current_game_board[move_index]
 
         # check if game is over
         if self.get_game_state() != 'UNFINISHED':
@@ -283,52 +965,27 @@ class JanggiGame:
         if current_player != self.get_player_turn():
             return False
 
-        # check if move square is on the game board
-        if (int(move_sq[1:])) < 1 or (int(move_sq[1:])) > 10:
-            return False
-        if (ord(move_sq[0]) - 96) < 1 or (ord(move_sq[0]) - 96) > 9:
-            return False
-
         # check if a piece of the same color as the player is in the move square
         if destination_piece is not None:
-            if current_piece != destination_piece:
+            if current_index != move_index:
                 destination_player = destination_piece.get_player()
                 if destination_player == current_player:
                     return False
 
         # check if the move is valid for the type of piece being moved
-        available_moves = current_piece.check_move(current_sq, current_game_board)
-        if move_sq not in available_moves:
+        available_moves = current_piece.check_move(current_index, current_game_board)
+        if move_index not in available_moves:
             return False
 
-        # if not passing, move the current piece to the move square
-        if current_sq != move_sq:
-            self.set_square(move_sq, current_piece)
+        # move the current piece to the move square (passing leaves the board unchanged)
+        # and update the player turn to the next player
+        self._push(current_index, move_index)
 
-        # if not passing, update the current square (moved from) on the board to be empty
-        if current_sq != move_sq:
-            self.set_square(current_sq)
-
-        # if moving piece is a general, update general square data member
-        # preserve former general square data member (in event move is invalid due to check)
-        temp_gen_location = self.get_gen_square(current_player)
-        if type(current_piece) is General:
-            self.set_gen_square(current_player, move_sq)
-
-        # determine if current player is in check following move (if so, reverse move and return false)
+        # determine if current player is in check following move (if so, take back move and return false)
         if self.is_in_check(current_player) is True:
-            self.set_square(current_sq, current_piece)
-            self.set_square(move_sq, destination_piece)
-            if type(current_piece) is General:
-                self.set_gen_square(current_player, temp_gen_location)
+            self._pop()
             return False
 
-        # move was successful, update player turn to next player
-        if self.get_player_turn() == 'blue':
-            self.set_player_turn('red')
-        else:
-            self.set_player_turn('blue')
-
         # determine if opposing player is in check following move
         if current_player == 'blue':
             opponent = 'red'
@@ -350,15 +1007,37 @@ class Piece:
     """Class represents a Piece on the JanggiGame board. Different subclasses of
     Piece represent different types of game pieces and are able to move and behave
     differently on the board. JanggiGame will need to know which player a Piece
-    belongs to and how it can move (defined in subclasses of Piece)."""
-
-    def __init__(self, player):
-        """Initializes private data members for a Piece. Private data members
-        include the color of the piece, which indicates to which player it belongs."""
-        self._player = player
-        # create lists of squares in each fortress for move determination
-        self._blue_fortress = ['d8', 'd9', 'd10', 'e8', 'e9', 'e10', 'f8', 'f9', 'f10']
-        self._red_fortress = ['d1', 'd2', 'd3', 'e1', 'e2', 'e3', 'f1', 'f2', 'f3']
+    belongs to and how it can move (defined in subclasses of Piece). Pieces hold no
+    state besides their player, so there is one shared, unchangeable instance of each
+    type of Piece for each player, no matter how many games or squares use it."""
+
+    __slots__ = ('_player',)
+    _shared_pieces = {}
+
+    def __new__(cls, player):
+        """Returns the shared instance of this type of Piece for the player, which is
+        created the first time it is requested. Private data members are set only
+        then, and include the color of the piece, which indicates to which player it
+        belongs. Piece has no __init__, so the shared instance is not set up again each
+        time it is requested."""
+        piece = Piece._shared_pieces.get((cls, player))
+        if piece is None:
+            piece = super().__new__(cls)
+            object.__setattr__(piece, '_player', player)
+            Piece._shared_pieces[(cls, player)] = piece
+        return piece
+
+    def __setattr__(self, name, value):
+        """Pieces are shared between games and squares, so they cannot be changed."""
+        raise AttributeError('Piece objects are shared and cannot be changed')
+
+    def __delattr__(self, name):
+        """Pieces are shared between games and squares, so they cannot be changed."""
+        raise AttributeError('Piece objects are shared and cannot be changed')
+
+    def __reduce__(self):
+        """Method lets copies and pickles of a Piece resolve to the shared instance."""
+        return type(self), (self._player,)
 
     def get_player(self):
         """Method takes no parameters and returns the color of the piece,
@@ -367,71 +1046,23 @@ class Piece:
 
     def get_fortress(self, player=None):
         """Method takes an optional parameter of the color of a player (string) and returns the
-        list of squares in that player's fortress. If the optional parameter is not passed an
-        argument, then the method will return a list of squares in both fortresses."""
+        shared frozenset of squares (indices) in that player's fortress. If the optional parameter
+        is not passed an argument, then the method will return the squares in both fortresses."""
         if player == 'blue':
-            return self._blue_fortress
+            return _BLUE_PALACE
         elif player == 'red':
-            return self._red_fortress
+            return _RED_PALACE
         else:
-            fort_list = self._blue_fortress + self._red_fortress
-            return fort_list
-
-
-class General(Piece):
-    """Class represents a General game piece in JanggiGame. A General is a Piece.
-    A General will communicate with a JanggiGame to tell which player the General
-    belongs to and what possible moves the General can make on the game board."""
+            return _PALACES
 
-    def check_move(self, current_sq, board_state):
-        """Method takes as parameters the current square this Piece occupies and
-        the current board state. Returns a list of available moves for the Piece."""
+    def step_moves(self, potential_moves, current_sq, board_state):
+        """Method takes as parameters a precomputed tuple of squares this Piece could
+        step onto, the index of the current square this Piece occupies and the current
+        board state. Returns a list of the potential moves that are not blocked by the
+        current player's other pieces, plus the current square for passing the turn."""
         moves_list = []
-        potential_moves = []
         current_player = self.get_player()
 
-        # determine valid moves for blue general from current square
-        if current_player == 'blue':
-            if current_sq == 'd8':
-                potential_moves = ['d8', 'd9', 'e8', 'e9']
-            if current_sq == 'd9':
-                potential_moves = ['d8', 'd9', 'd10', 'e9']
-            if current_sq == 'd10':
-                potential_moves = ['d9', 'd10', 'e9', 'e10']
-            if current_sq == 'e8':
-                potential_moves = ['d8', 'e8', 'e9', 'f8']
-            if current_sq == 'e9':
-                potential_moves = self.get_fortress('blue')
-            if current_sq == 'e10':
-                potential_moves = ['d10', 'e10', 'e9', 'f10']
-            if current_sq == 'f8':
-                potential_moves = ['e8', 'e9', 'f8', 'f9']
-            if current_sq == 'f9':
-                potential_moves = ['e9', 'f8', 'f9', 'f10']
-            if current_sq == 'f10':
-                potential_moves = ['e9', 'e10', 'f9', 'f10']
-
-        # determine valid moves for red general from current square
-        if current_player == 'red':
-            if current_sq == 'd1':
-                potential_moves = ['d1', 'd2', 'e1', 'e2']
-            if current_sq == 'd2':
-                potential_moves = ['d1', 'd2', 'd3', 'e2']
-            if current_sq == 'd3':
-                potential_moves = ['d2', 'd3', 'e2', 'e3']
-            if current_sq == 'e1':
-                potential_moves = ['d1', 'e1', 'e2', 'f1']
-            if current_sq == 'e2':
-                potential_moves = self.get_fortress('red')
-            if current_sq == 'e3':
-                potential_moves = ['d3', 'e3', 'e2', 'f3']
-            if current_sq == 'f1':
-                potential_moves = ['e1', 'e2', 'f1', 'f2']
-            if current_sq == 'f2':
-                potential_moves = ['e2', 'f1', 'f2', 'f3']
-            if current_sq == 'f3':
-                potential_moves = ['e2', 'e3', 'f2', 'f3']
-
         # remove moves blocked by current player's other pieces
         for square in potential_moves:
             if board_state[square] is None:
@@ -445,71 +1076,32 @@ class General(Piece):
         return moves_list
 
 
-class Guard(Piece):
-    """Class represents a Guard game piece in JanggiGame. A Guard is a Piece.
-    A Guard will communicate with a JanggiGame to tell which player the Guard
-    belongs to and what possible moves the Guard can make on the game board."""
+class General(Piece):
+    """Class represents a General game piece in JanggiGame. A General is a Piece.
+    A General will communicate with a JanggiGame to tell which player the General
+    belongs to and what possible moves the General can make on the game board."""
+
+    __slots__ = ()
 
     def check_move(self, current_sq, board_state):
-        """Method takes as parameters the current square this Piece occupies and
-        the current board state. Returns a list of available moves for the Piece."""
-        moves_list = []
-        potential_moves = []
-        current_player = self.get_player()
+        """Method takes as parameters the index of the current square this Piece
+        occupies and the current board state (a flat list of squares). Returns a list
+        of available moves (square indices) for the Piece."""
+        return self.step_moves(_PALACE_MOVES[self.get_player()][current_sq], current_sq, board_state)
 
-        # determine valid moves for blue guard from current square
-        if current_player == 'blue':
-            if current_sq == 'd8':
-                potential_moves = ['d8', 'd9', 'e8', 'e9']
-            if current_sq == 'd9':
-                potential_moves = ['d8', 'd9', 'd10', 'e9']
-            if current_sq == 'd10':
-                potential_moves = ['d9', 'd10', 'e9', 'e10']
-            if current_sq == 'e8':
-                potential_moves = ['d8', 'e8', 'e9', 'f8']
-            if current_sq == 'e9':
-                potential_moves = self.get_fortress('blue')
-            if current_sq == 'e10':
-                potential_moves = ['d10', 'e10', 'e9', 'f10']
-            if current_sq == 'f8':
-                potential_moves = ['e8', 'e9', 'f8', 'f9']
-            if current_sq == 'f9':
-                potential_moves = ['e9', 'f8', 'f9', 'f10']
-            if current_sq == 'f10':
-                potential_moves = ['e9', 'e10', 'f9', 'f10']
-
-        # determine valid moves for red guard from current square
-        if current_player == 'red':
-            if current_sq == 'd1':
-                potential_moves = ['d1', 'd2', 'e1', 'e2']
-            if current_sq == 'd2':
-                potential_moves = ['d1', 'd2', 'd3', 'e2']
-            if current_sq == 'd3':
-                potential_moves = ['d2', 'd3', 'e2', 'e3']
-            if current_sq == 'e1':
-                potential_moves = ['d1', 'e1', 'e2', 'f1']
-            if current_sq == 'e2':
-                potential_moves = self.get_fortress('red')
-            if current_sq == 'e3':
-                potential_moves = ['d3', 'e3', 'e2', 'f3']
-            if current_sq == 'f1':
-                potential_moves = ['e1', 'e2', 'f1', 'f2']
-            if current_sq == 'f2':
-                potential_moves = ['e2', 'f1', 'f2', 'f3']
-            if current_sq == 'f3':
-                potential_moves = ['e2', 'e3', 'f2', 'f3']
 
-        # remove moves blocked by current player's other pieces
-        for square in potential_moves:
-            if board_state[square] is None:
-                moves_list.append(square)
-            elif board_state[square].get_player() != current_player:
-                moves_list.append(square)
+class Guard(Piece):
+    """Class represents a Guard game piece in JanggiGame. A Guard is a Piece.
+    A Guard will communicate with a JanggiGame to tell which player the Guard
+    belongs to and what possible moves the Guard can make on the game board."""
 
-        # add current square as move for passing turn
-        moves_list.append(current_sq)
+    __slots__ = ()
 
-        return moves_list
+    def check_move(self, current_sq, board_state):
+        """Method takes as parameters the index of the current square this Piece
+        occupies and the current board state (a flat list of squares). Returns a list
+        of available moves (square indices) for the Piece."""
+        return self.step_moves(_PALACE_MOVES[self.get_player()][current_sq], current_sq, board_state)
 
 
 class Horse(Piece):
@@ -517,59 +1109,24 @@ class Horse(Piece):
     A Horse will communicate with a JanggiGame to tell which player the Horse
     belongs to and what possible moves the Horse can make on the game board."""
 
+    __slots__ = ()
+
     def check_move(self, current_sq, board_state):
-        """Method takes as parameters the current square this Piece occupies and
-        the current board state. Returns a list of available moves for the Piece."""
-        current_square = current_sq
-        cur_row_num = int(current_square[1:])
-        cur_col_num = ord(current_square[0]) - 96
+        """Method takes as parameters the index of the current square this Piece
+        occupies and the current board state (a flat list of squares). Returns a list
+        of available moves (square indices) for the Piece."""
         move_list = []
-        current_board = board_state
-
-        # determine possible moves for horse from current position
-        up_1 = chr(cur_col_num + 96) + str(cur_row_num - 1)
-        down_1 = chr(cur_col_num + 96) + str(cur_row_num + 1)
-        left_1 = chr(cur_col_num + 95) + str(cur_row_num)
-        right_1 = chr(cur_col_num + 97) + str(cur_row_num)
-
-        # check if first step of horse move is available
-        if up_1 in current_board and current_board[up_1] is None:
-
-            # add completed move squares to available moves
-            up_2_left_1 = chr(cur_col_num + 95) + str(cur_row_num - 2)
-            if up_2_left_1 in current_board:
-                move_list.append(up_2_left_1)
-
-            up_2_right_1 = chr(cur_col_num + 97) + str(cur_row_num - 2)
-            if up_2_right_1 in current_board:
-                move_list.append(up_2_right_1)
-
-        if down_1 in current_board and current_board[down_1] is None:
-            down_2_left_1 = chr(cur_col_num + 95) + str(cur_row_num + 2)
-            if down_2_left_1 in current_board:
-                move_list.append(down_2_left_1)
-            down_2_right_1 = chr(cur_col_num + 97) + str(cur_row_num + 2)
-            if down_2_right_1 in current_board:
-                move_list.append(down_2_right_1)
-
-        if left_1 in current_board and current_board[left_1] is None:
-            left_2_up_1 = chr(cur_col_num + 94) + str(cur_row_num - 1)
-            if left_2_up_1 in current_board:
-                move_list.append(left_2_up_1)
-            left_2_down_1 = chr(cur_col_num + 94) + str(cur_row_num + 1)
-            if left_2_down_1 in current_board:
-                move_list.append(left_2_down_1)
-
-        if right_1 in current_board and current_board[right_1] is None:
-            right_2_up_1 = chr(cur_col_num + 98) + str(cur_row_num - 1)
-            if right_2_up_1 in current_board:
-                move_list.append(right_2_up_1)
-            right_2_down_1 = chr(cur_col_num + 98) + str(cur_row_num + 1)
-            if right_2_down_1 in current_board:
-                move_list.append(right_2_down_1)
+        current_player = self.get_player()
+
+        # a horse move is available if its leg is empty and the move square does not
+        # contain one of the current player's pieces
+        for leg, move in _HORSE_MOVES[current_sq]:
+            if board_state[leg] is None:
+                if board_state[move] is None or board_state[move].get_player() != current_player:
+                    move_list.append(move)
 
         # add current square as move for passing turn
-        move_list.append(current_square)
+        move_list.append(current_sq)
 
         return move_list
 
@@ -579,86 +1136,24 @@ class Elephant(Piece):
     A Elephant will communicate with a JanggiGame to tell which player the Elephant
     belongs to and what possible moves the Elephant can make on the game board."""
 
+    __slots__ = ()
+
     def check_move(self, current_sq, board_state):
-        """Method takes as parameters the current square this Piece occupies and
-        the current board state. Returns a list of available moves for the Piece."""
-        current_square = current_sq
-        cur_row_num = int(current_square[1:])
-        cur_col_num = ord(current_square[0]) - 96
+        """Method takes as parameters the index of the current square this Piece
+        occupies and the current board state (a flat list of squares). Returns a list
+        of available moves (square indices) for the Piece."""
         move_list = []
-        current_board = board_state
-
-        # determine possible moves for elephant from current position
-        up_1 = chr(cur_col_num + 96) + str(cur_row_num - 1)
-        down_1 = chr(cur_col_num + 96) + str(cur_row_num + 1)
-        left_1 = chr(cur_col_num + 95) + str(cur_row_num)
-        right_1 = chr(cur_col_num + 97) + str(cur_row_num)
-
-        # check if first step of elephant move is available
-        if up_1 in current_board and current_board[up_1] is None:
-
-            # check if second steps of elephant move are available
-            up_2_left_1 = chr(cur_col_num + 95) + str(cur_row_num - 2)
-            if up_2_left_1 in current_board and current_board[up_2_left_1] is None:
-
-                # add completed move square to available moves
-                up_3_left_2 = chr(cur_col_num + 94) + str(cur_row_num - 3)
-                if up_3_left_2 in current_board:
-                    move_list.append(up_3_left_2)
-
-            # check if second steps of elephant move are available
-            up_2_right_1 = chr(cur_col_num + 97) + str(cur_row_num - 2)
-            if up_2_right_1 in current_board and current_board[up_2_right_1] is None:
-
-                # add completed move square to available moves
-                up_3_right_2 = chr(cur_col_num + 98) + str(cur_row_num - 3)
-                if up_3_right_2 in current_board:
-                    move_list.append(up_3_right_2)
-
-        if down_1 in current_board and current_board[down_1] is None:
-
-            down_2_left_1 = chr(cur_col_num + 95) + str(cur_row_num + 2)
-            if down_2_left_1 in current_board and current_board[down_2_left_1] is None:
-                down_3_left_2 = chr(cur_col_num + 94) + str(cur_row_num + 3)
-                if down_3_left_2 in current_board:
-                    move_list.append(down_3_left_2)
-
-            down_2_right_1 = chr(cur_col_num + 97) + str(cur_row_num + 2)
-            if down_2_right_1 in current_board and current_board[down_2_right_1] is None:
-                down_3_right_2 = chr(cur_col_num + 98) + str(cur_row_num + 3)
-                if down_3_right_2 in current_board:
-                    move_list.append(down_3_right_2)
-
-        if left_1 in current_board and current_board[left_1] is None:
-
-            left_2_up_1 = chr(cur_col_num + 94) + str(cur_row_num - 1)
-            if left_2_up_1 in current_board and current_board[left_2_up_1] is None:
-                left_3_up_2 = chr(cur_col_num + 93) + str(cur_row_num - 2)
-                if left_3_up_2 in current_board:
-                    move_list.append(left_3_up_2)
-
-            left_2_down_1 = chr(cur_col_num + 94) + str(cur_row_num + 1)
-            if left_2_down_1 in current_board and current_board[left_2_down_1] is None:
-                left_3_down_2 = chr(cur_col_num + 93) + str(cur_row_num + 2)
-                if left_3_down_2 in current_board:
-                    move_list.append(left_3_down_2)
-
-        if right_1 in current_board and current_board[right_1] is None:
-
-            right_2_up_1 = chr(cur_col_num + 98) + str(cur_row_num - 1)
-            if right_2_up_1 in current_board and current_board[right_2_up_1] is None:
-                right_3_up_2 = chr(cur_col_num + 99) + str(cur_row_num - 2)
-                if right_3_up_2 in current_board:
-                    move_list.append(right_3_up_2)
-
-            right_2_down_1 = chr(cur_col_num + 98) + str(cur_row_num + 1)
-            if right_2_down_1 in current_board and current_board[right_2_down_1] is None:
-                right_3_down_2 = chr(cur_col_num + 99) + str(cur_row_num + 2)
-                if right_3_down_2 in current_board:
-                    move_list.append(right_3_down_2)
+        current_player = self.get_player()
+
+        # an elephant move is available if both of its legs are empty and the move
+        # square does not contain one of the current player's pieces
+        for first_leg, second_leg, move in _ELEPHANT_MOVES[current_sq]:
+            if board_state[first_leg] is None and board_state[second_leg] is None:
+                if board_state[move] is None or board_state[move].get_player() != current_player:
+                    move_list.append(move)
 
         # add current square as move for passing turn
-        move_list.append(current_square)
+        move_list.append(current_sq)
 
         return move_list
 
@@ -668,443 +1163,134 @@ class Chariot(Piece):
     A Chariot will communicate with a JanggiGame to tell which player the Chariot
     belongs to and what possible moves the Chariot can make on the game board."""
 
+    __slots__ = ()
+
     def check_move(self, current_sq, board_state):
-        """Method takes as parameters the current square this Piece occupies and
-        the current board state. Returns a list of available moves for the Piece."""
-        cur_row_num = int(current_sq[1:])
-        cur_col_num = ord(current_sq[0]) - 96
-        current_board = board_state
-
-        # determine possible moves for chariot
-        up = self.path_up_col(cur_row_num, cur_col_num, current_board)
-        down = self.path_down_col(cur_row_num, cur_col_num, current_board)
-        left = self.path_left_row(cur_row_num, cur_col_num, current_board)
-        right = self.path_right_row(cur_row_num, cur_col_num, current_board)
-        move_list = up + down + left + right
-
-        # if chariot is in red fortress, add additional moves
-        if current_sq == 'd1':
-            if current_board['e2'] is None or current_board['e2'].get_player() != self.get_player():
-                move_list.append('e2')
-                if current_board['f3'] is None or current_board['f3'].get_player() != self.get_player():
-                    move_list.append('f3')
-
-        if current_sq == 'f1':
-            if current_board['e2'] is None or current_board['e2'].get_player() != self.get_player():
-                move_list.append('e2')
-                if current_board['d3'] is None or current_board['d3'].get_player() != self.get_player():
-                    move_list.append('d3')
-
-        if current_sq == 'd3':
-            if current_board['e2'] is None or current_board['e2'].get_player() != self.get_player():
-                move_list.append('e2')
-                if current_board['f1'] is None or current_board['f1'].get_player() != self.get_player():
-                    move_list.append('f1')
-
-        if current_sq == 'f3':
-            if current_board['e2'] is None or current_board['e2'].get_player() != self.get_player():
-                move_list.append('e2')
-                if current_board['d1'] is None or current_board['d1'].get_player() != self.get_player():
-                    move_list.append('d1')
-
-        if current_sq == 'e2':
-            if current_board['d1'] is None or current_board['d1'].get_player() != self.get_player():
-                move_list.append('d1')
-            if current_board['f1'] is None or current_board['f1'].get_player() != self.get_player():
-                move_list.append('f1')
-            if current_board['d3'] is None or current_board['d3'].get_player() != self.get_player():
-                move_list.append('d3')
-            if current_board['f3'] is None or current_board['f3'].get_player() != self.get_player():
-                move_list.append('f3')
-
-        # if chariot is in blue fortress, add additional moves
-        if current_sq == 'd8':
-            if current_board['e9'] is None or current_board['e9'].get_player() != self.get_player():
-                move_list.append('e9')
-                if current_board['f10'] is None or current_board['f10'].get_player() != self.get_player():
-                    move_list.append('f10')
-
-        if current_sq == 'f8':
-            if current_board['e9'] is None or current_board['e9'].get_player() != self.get_player():
-                move_list.append('e9')
-                if current_board['d10'] is None or current_board['d10'].get_player() != self.get_player():
-                    move_list.append('d10')
-
-        if current_sq == 'd10':
-            if current_board['e9'] is None or current_board['e9'].get_player() != self.get_player():
-                move_list.append('e9')
-                if current_board['f8'] is None or current_board['f8'].get_player() != self.get_player():
-                    move_list.append('f8')
-
-        if current_sq == 'f10':
-            if current_board['e9'] is None or current_board['e9'].get_player() != self.get_player():
-                move_list.append('e9')
-                if current_board['d8'] is None or current_board['d8'].get_player() != self.get_player():
-                    move_list.append('d8')
-
-        if current_sq == 'e9':
-            if current_board['d8'] is None or current_board['d8'].get_player() != self.get_player():
-                move_list.append('d8')
-            if current_board['f8'] is None or current_board['f8'].get_player() != self.get_player():
-                move_list.append('f8')
-            if current_board['d10'] is None or current_board['d10'].get_player() != self.get_player():
-                move_list.append('d10')
-            if current_board['f10'] is None or current_board['f10'].get_player() != self.get_player():
-                move_list.append('f10')
+        """Method takes as parameters the index of the current square this Piece
+        occupies and the current board state (a flat list of squares). Returns a list
+        of available moves (square indices) for the Piece."""
+        move_list = []
+        current_player = self.get_player()
+
+        # move along each ray until reaching a piece, which can be captured if it
+        # belongs to the opposing player
+        for ray in _RAYS[current_sq]:
+            for look_sq in ray:
+                look_piece = board_state[look_sq]
+                if look_piece is None:
+                    move_list.append(look_sq)
+                else:
+                    if look_piece.get_player() != current_player:
+                        move_list.append(look_sq)
+                    break
 
         # add current square as move for passing turn
         move_list.append(current_sq)
 
         return move_list
 
-    def path_up_col(self, cur_row, cur_col, board):
-        """Method takes as parameters the row number of the current piece, the
-        column number of the current piece, and the current state of the board.
-        Returns a list of possible moves upwards in a line on the board."""
-        moves_up = []
-        look_row = cur_row - 1
-        look_col = cur_col
-        while look_row > 0:
-            look_sq = chr(look_col + 96) + str(look_row)
-            if board[look_sq] is None:
-                moves_up.append(look_sq)
-            if board[look_sq] is not None and board[look_sq].get_player() == self.get_player():
-                return moves_up
-            if board[look_sq] is not None and board[look_sq].get_player() != self.get_player():
-                moves_up.append(look_sq)
-                return moves_up
-            look_row -= 1
-        return moves_up
-
-    def path_down_col(self, cur_row, cur_col, board):
-        """Method takes as parameters the row number of the current piece, the
-        column number of the current piece, and the current state of the board.
-        Returns a list of possible moves downwards in a line on the board."""
-        moves_down = []
-        look_row = cur_row + 1
-        look_col = cur_col
-        while look_row < 11:
-            look_sq = chr(look_col + 96) + str(look_row)
-            if board[look_sq] is None:
-                moves_down.append(look_sq)
-            if board[look_sq] is not None and board[look_sq].get_player() == self.get_player():
-                return moves_down
-            if board[look_sq] is not None and board[look_sq].get_player() != self.get_player():
-                moves_down.append(look_sq)
-                return moves_down
-            look_row += 1
-        return moves_down
-
-    def path_left_row(self, cur_row, cur_col, board):
-        """Method takes as parameters the row number of the current piece, the
-        column number of the current piece, and the current state of the board.
-        Returns a list of possible moves to the left in a line on the board."""
-        moves_left = []
-        look_row = cur_row
-        look_col = cur_col - 1
-        while look_col > 0:
-            look_sq = chr(look_col + 96) + str(look_row)
-            if board[look_sq] is None:
-                moves_left.append(look_sq)
-            if board[look_sq] is not None and board[look_sq].get_player() == self.get_player():
-                return moves_left
-            if board[look_sq] is not None and board[look_sq].get_player() != self.get_player():
-                moves_left.append(look_sq)
-                return moves_left
-            look_col -= 1
-        return moves_left
-
-    def path_right_row(self, cur_row, cur_col, board):
-        """Method takes as parameters the row number of the current piece, the
-        column number of the current piece, and the current state of the board.
-        Returns a list of possible moves to the right in a line on the board."""
-        moves_right = []
-        look_row = cur_row
-        look_col = cur_col + 1
-        while look_col < 10:
-            look_sq = chr(look_col + 96) + str(look_row)
-            if board[look_sq] is None:
-                moves_right.append(look_sq)
-            if board[look_sq] is not None and board[look_sq].get_player() == self.get_player():
-                return moves_right
-            if board[look_sq] is not None and board[look_sq].get_player() != self.get_player():
-                moves_right.append(look_sq)
-                return moves_right
-            look_col += 1
-        return moves_right
-
 
 class Cannon(Piece):
     """Class represents a Cannon game piece in JanggiGame. A Cannon is a Piece.
     A Cannon will communicate with a JanggiGame to tell which player the Cannon
     belongs to and what possible moves the Cannon can make on the game board."""
 
+    __slots__ = ()
+
     def check_move(self, current_sq, board_state):
-        """Method takes as parameters the current square this Piece occupies and
-        the current board state. Returns a list of available moves for the Piece."""
-        cur_row_num = int(current_sq[1:])
-        cur_col_num = ord(current_sq[0]) - 96
-        current_board = board_state
-        current_square = current_sq
-
-        # determine possible moves for cannon
-        up = self.path_up_col(cur_row_num, cur_col_num, current_board)
-        down = self.path_down_col(cur_row_num, cur_col_num, current_board)
-        left = self.path_left_row(cur_row_num, cur_col_num, current_board)
-        right = self.path_right_row(cur_row_num, cur_col_num, current_board)
-        move_list = up + down + left + right
-
-        # if cannon is in blue fortress, add additional moves
-        if current_square == 'd8':
-            if current_board['e9'] is not None and type(current_board['e9']) is not Cannon:
-                if current_board['f10'] is None:
-                    move_list.append('f10')
-                elif current_board['f10'].get_player() != self.get_player():
-                    if type(current_board['f10']) is not Cannon:
-                        move_list.append('f10')
-
-        if current_square == 'f8':
-            if current_board['e9'] is not None and type(current_board['e9']) is not Cannon:
-                if current_board['d10'] is None:
-                    move_list.append('d10')
-                elif current_board['d10'].get_player() != self.get_player():
-                    if type(current_board['d10']) is not Cannon:
-                        move_list.append('d10')
-
-        if current_square == 'd10':
-            if current_board['e9'] is not None and type(current_board['e9']) is not Cannon:
-                if current_board['f8'] is None:
-                    move_list.append('f8')
-                elif current_board['f8'].get_player() != self.get_player():
-                    if type(current_board['f8']) is not Cannon:
-                        move_list.append('f8')
-
-        if current_square == 'f10':
-            if current_board['e9'] is not None and type(current_board['e9']) is not Cannon:
-                if current_board['d8'] is None:
-                    move_list.append('d8')
-                elif current_board['d8'].get_player() != self.get_player():
-                    if type(current_board['d8']) is not Cannon:
-                        move_list.append('d8')
-
-        # if cannon is in red fortress, add additional moves
-        if current_square == 'd1':
-            if current_board['e2'] is not None and type(current_board['e9']) is not Cannon:
-                if current_board['f3'] is None:
-                    move_list.append('f3')
-                elif current_board['f3'].get_player() != self.get_player():
-                    if type(current_board['f3']) is not Cannon:
-                        move_list.append('f3')
-
-        if current_square == 'f1':
-            if current_board['e2'] is not None and type(current_board['e9']) is not Cannon:
-                if current_board['d3'] is None:
-                    move_list.append('d3')
-                elif current_board['d3'].get_player() != self.get_player():
-                    if type(current_board['d3']) is not Cannon:
-                        move_list.append('d3')
-
-        if current_square == 'd3':
-            if current_board['e2'] is not None and type(current_board['e9']) is not Cannon:
-                if current_board['f1'] is None:
-                    move_list.append('f1')
-                elif current_board['f1'].get_player() != self.get_player():
-                    if type(current_board['f1']) is not Cannon:
-                        move_list.append('f1')
-
-        if current_square == 'f3':
-            if current_board['e2'] is not None and type(current_board['e9']) is not Cannon:
-                if current_board['d1'] is None:
-                    move_list.append('d1')
-                elif current_board['d1'].get_player() != self.get_player():
-                    if type(current_board['d1']) is not Cannon:
-                        move_list.append('d1')
+        """Method takes as parameters the index of the current square this Piece
+        occupies and the current board state (a flat list of squares). Returns a list
+        of available moves (square indices) for the Piece."""
+        move_list = []
+        current_player = self.get_player()
+
+        for ray in _RAYS[current_sq]:
+
+            # find the first piece along the ray, which the cannon must jump over
+            for screen_index, look_sq in enumerate(ray):
+                if board_state[look_sq] is not None:
+                    break
+            else:
+                continue
+            if type(board_state[look_sq]) is Cannon:
+                continue
+
+            # move past the screen until reaching a piece, which can be captured if it
+            # belongs to the opposing player and is not a cannon
+            for look_sq in ray[screen_index + 1:]:
+                look_piece = board_state[look_sq]
+                if look_piece is None:
+                    move_list.append(look_sq)
+                else:
+                    if look_piece.get_player() != current_player and type(look_piece) is not Cannon:
+                        move_list.append(look_sq)
+                    break
 
         # add current square as move for passing turn
         move_list.append(current_sq)
 
         return move_list
 
-    def path_up_col(self, cur_row, cur_col, board):
-        """Method takes as parameters the row number of the current piece, the
-        column number of the current piece, and the current state of the board.
-        Returns a list of possible moves upwards in a line on the board."""
-        moves_up = []
-        jumping = False
-        look_row = cur_row - 1
-        look_col = cur_col
-        while look_row > 0:
-            look_sq = chr(look_col + 96) + str(look_row)
-            if board[look_sq] is None and jumping is True:
-                moves_up.append(look_sq)
-            if board[look_sq] is not None and jumping is True:
-                if board[look_sq].get_player() == self.get_player():
-                    return moves_up
-                if board[look_sq].get_player() != self.get_player():
-                    if type(board[look_sq]) is Cannon:
-                        return moves_up
-                    else:
-                        moves_up.append(look_sq)
-                        return moves_up
-            if board[look_sq] is not None and jumping is False:
-                if type(board[look_sq]) is Cannon:
-                    return moves_up
-                jumping = True
-            look_row -= 1
-        return moves_up
-
-    def path_down_col(self, cur_row, cur_col, board):
-        """Method takes as parameters the row number of the current piece, the
-        column number of the current piece, and the current state of the board.
-        Returns a list of possible moves downwards in a line on the board."""
-        moves_down = []
-        jumping = False
-        look_row = cur_row + 1
-        look_col = cur_col
-        while look_row < 11:
-            look_sq = chr(look_col + 96) + str(look_row)
-            if board[look_sq] is None and jumping is True:
-                moves_down.append(look_sq)
-            if board[look_sq] is not None and jumping is True:
-                if board[look_sq].get_player() == self.get_player():
-                    return moves_down
-                if board[look_sq].get_player() != self.get_player():
-                    if type(board[look_sq]) is Cannon:
-                        return moves_down
-                    else:
-                        moves_down.append(look_sq)
-                        return moves_down
-            if board[look_sq] is not None and jumping is False:
-                if type(board[look_sq]) is Cannon:
-                    return moves_down
-                jumping = True
-            look_row += 1
-        return moves_down
-
-    def path_left_row(self, cur_row, cur_col, board):
-        """Method takes as parameters the row number of the current piece, the
-        column number of the current piece, and the current state of the board.
-        Returns a list of possible moves to the left in a line on the board."""
-        moves_left = []
-        jumping = False
-        look_row = cur_row
-        look_col = cur_col - 1
-        while look_col > 0:
-            look_sq = chr(look_col + 96) + str(look_row)
-            if board[look_sq] is None and jumping is True:
-                moves_left.append(look_sq)
-            if board[look_sq] is not None and jumping is True:
-                if board[look_sq].get_player() == self.get_player():
-                    return moves_left
-                if board[look_sq].get_player() != self.get_player():
-                    if type(board[look_sq]) is Cannon:
-                        return moves_left
-                    else:
-                        moves_left.append(look_sq)
-                        return moves_left
-            if board[look_sq] is not None and jumping is False:
-                if type(board[look_sq]) is Cannon:
-                    return moves_left
-                jumping = True
-            look_col -= 1
-        return moves_left
-
-    def path_right_row(self, cur_row, cur_col, board):
-        """Method takes as parameters the row number of the current piece, the
-        column number of the current piece, and the current state of the board.
-        Returns a list of possible moves to the right in a line on the board."""
-        moves_right = []
-        jumping = False
-        look_row = cur_row
-        look_col = cur_col + 1
-        while look_col < 10:
-            look_sq = chr(look_col + 96) + str(look_row)
-            if board[look_sq] is None and jumping is True:
-                moves_right.append(look_sq)
-            if board[look_sq] is not None and jumping is True:
-                if board[look_sq].get_player() == self.get_player():
-                    return moves_right
-                if board[look_sq].get_player() != self.get_player():
-                    if type(board[look_sq]) is Cannon:
-                        return moves_right
-                    else:
-                        moves_right.append(look_sq)
-                        return moves_right
-            if board[look_sq] is not None and jumping is False:
-                if type(board[look_sq]) is Cannon:
-                    return moves_right
-                jumping = True
-            look_col += 1
-        return moves_right
-
 
 class Soldier(Piece):
     """Class represents a Soldier game piece in JanggiGame. A Soldier is a Piece.
     A Soldier will communicate with a JanggiGame to tell which player the Soldier
     belongs to and what possible moves the Soldier can make on the game board."""
 
-    def check_move(self, current_sq, board_state):
-        """Method takes as parameters the current square this Piece occupies and
-        the current board state. Returns a list of available moves for the Piece."""
-        cur_row_num = int(current_sq[1:])
-        cur_col_num = ord(current_sq[0]) - 96
-        potential_moves = []
-        move_list = []
-        current_board = board_state
-
-        # add standard set of possible soldier moves to moves list
-        if self.get_player() == 'blue':
-
-            left_1 = chr(cur_col_num + 95) + str(cur_row_num)
-            if left_1 in current_board:
-                potential_moves.append(left_1)
-
-            right_1 = chr(cur_col_num + 97) + str(cur_row_num)
-            if right_1 in current_board:
-                potential_moves.append(right_1)
-
-            up_1 = chr(cur_col_num + 96) + str(cur_row_num - 1)
-            if up_1 in current_board:
-                potential_moves.append(up_1)
+    __slots__ = ()
 
-        if self.get_player() == 'red':
-
-            left_1 = chr(cur_col_num + 95) + str(cur_row_num)
-            if left_1 in current_board:
-                potential_moves.append(left_1)
-
-            right_1 = chr(cur_col_num + 97) + str(cur_row_num)
-            if right_1 in current_board:
-                potential_moves.append(right_1)
-
-            down_1 = chr(cur_col_num + 96) + str(cur_row_num + 1)
-            if down_1 in current_board:
-                potential_moves.append(down_1)
-
-        # if the soldier is in the red fortress, include diagonal moves
-        if current_sq in self.get_fortress('red'):
-            if current_sq == 'd3' or current_sq == 'f3':
-                potential_moves.append('e2')
-            if current_sq == 'e2':
-                potential_moves.append('d1')
-                potential_moves.append('f1')
-
-        # if the soldier is in the blue fortress, include diagonal moves
-        if current_sq in self.get_fortress('blue'):
-            if current_sq == 'd8' or current_sq == 'f8':
-                potential_moves.append('e9')
-            if current_sq == 'e9':
-                potential_moves.append('d10')
-                potential_moves.append('f10')
-
-        # remove moves blocked by current player's other pieces
-        for square in potential_moves:
-            if current_board[square] is None:
-                move_list.append(square)
-            elif current_board[square].get_player() != self.get_player():
-                move_list.append(square)
-
-        # add current square as move for passing turn
-        move_list.append(current_sq)
-
-        return move_list
+    def check_move(self, current_sq, board_state):
+        """Method takes as parameters the index of the current square this Piece
+        occupies and the current board state (a flat list of squares). Returns a list
+        of available moves (square indices) for the Piece."""
+        return self.step_moves(_SOLDIER_MOVES[self.get_player()][current_sq], current_sq, board_state)
+
+
+# the copy of the game each perft worker process counts moves on
+_perft_game = None
+
+
+def _perft_worker_start(game):
+    """Function takes as a parameter the JanggiGame a perft_report is for, and keeps the
+    copy each worker process receives when it starts."""
+    global _perft_game
+    _perft_game = game
+
+
+def _perft_worker(task):
+    """Function takes as a parameter a tuple of (square moved from, square moved onto,
+    depth, passes) for a root move, and returns a tuple of (process id, perft count of the
+    position after the move at that depth, seconds taken) for the worker process."""
+    current_sq, move_sq, depth, passes = task
+    game = _perft_game
+    start_time = time.perf_counter()
+    opponent = 'red' if game.get_player_turn() == 'blue' else 'blue'
+    game._push(current_sq, move_sq)
+    nodes = game._perft(opponent, depth, passes)
+    game._pop()
+    return os.getpid(), nodes, time.perf_counter() - start_time
+
+
+# the shared instance of each type of Piece for each player, by player and type, for the
+# move generator to look up instead of calling the classes
+_PIECES = {player: {piece_type: piece_type(player)
+                    for piece_type in (General, Guard, Horse, Elephant, Chariot, Cannon, Soldier)}
+           for player in ('blue', 'red')}
+
+
+# Zobrist keys: a random 64-bit number for each type of Piece of each player on each
+# square, and one for red to move. The key of a position is the XOR of the numbers for
+# the pieces on the board (and red to move), so a move updates it with a few XORs. A
+# fixed seed gives every process the same keys.
+_ZOBRIST_RANDOM = random.Random(2021)
+_ZOBRIST_KEYS = {piece_type(player): tuple(_ZOBRIST_RANDOM.getrandbits(64) for square in range(90))
+                 for piece_type in (General, Guard, Horse, Elephant, Chariot, Cannon, Soldier)
+                 for player in ('blue', 'red')}
+_ZOBRIST_TURN = _ZOBRIST_RANDOM.getrandbits(64)
+
+
+# value of each Piece and its score (value plus piece-square bonus) on each square, from
+# the tables in JanggiEval.py
+_PIECE_VALUES = {piece: JanggiEval.PIECE_VALUES[type(piece).__name__] for piece in _ZOBRIST_KEYS}
+_SQUARE_SCORES = {piece: JanggiEval.square_scores(type(piece).__name__, piece.get_player())
+                  for piece in _ZOBRIST_KEYS}
@@ -0,0 +1,192 @@
+# Description: This file contains a fixed-size transposition table for searching Janggi
+# positions. Results are stored by the Zobrist key of a position (see position_key in
+# JanggiGame.py), so a position that is reached again, whether by another move order or
+# on a later turn, can reuse the result instead of being searched again. The table is a
+# flat preallocated array of 64-bit words, two words per entry and two entries per
+# bucket: one entry kept for the deepest result and one that is always replaced. The
+# array can be placed in shared memory so that several search processes use one table.
+# Entries are written without locks, and the key word of each entry is stored XORed with
+# its data word, so an entry torn by two processes writing it at once no longer matches
+# its key and is ignored.
+
+from array import array
+from multiprocessing import shared_memory
+
+# bound types of a stored score: the exact score, or a lower or upper bound on it
+EXACT = 1
+LOWER = 2
+UPPER = 3
+
+# layout of the data word of an entry (the other word holds the position key XOR the data)
+_SCORE_BITS = 32
+_SCORE_BIAS = 1 << (_SCORE_BITS - 1)
+_MOVE_SHIFT = 32
+_DEPTH_SHIFT = 46
+_BOUND_SHIFT = 54
+_AGE_SHIFT = 56
+_MOVE_MASK = (1 << 14) - 1
+_BYTE_MASK = 0xFF
+_ENTRY_BYTES = 16
+
+
+def _encode_move(move):
+    """Function takes as a parameter a move as a pair of square indices, or None, and
+    returns it packed into 14 bits, where 0 means no move."""
+    if move is None:
+        return 0
+    return move[0] * 90 + move[1] + 1
+
+
+def _decode_move(code):
+    """Function takes as a parameter a move packed by _encode_move and returns the pair
+    of square indices, or None."""
+    if code == 0:
+        return None
+    return divmod(code - 1, 90)
+
+
+class TranspositionTable:
+    """Class represents a transposition table of search results keyed by the Zobrist
+    key of a position. Each entry holds the depth searched, the bound type and score
+    found and the best move. The table uses a fixed amount of memory set when it is
+    created. An age counter tells the entries of the current search apart from those
+    left over from earlier searches, which are replaced first. A table can be created
+    in shared memory and opened by name from other processes."""
+
+    def __init__(self, tt_size_mb=16, shared=False, name=None):
+        """Initializes private data members for a TranspositionTable. Private data
+        members include the flat array of entries, sized to the largest power of two
+        number of buckets that fits in tt_size_mb megabytes, the mask that maps a key
+        onto a bucket, and the age of the current search. If shared is True the entries
+        are placed in a new block of shared memory. If the name of a block of shared
+        memory holding a table is given, that table is opened instead (and its size is
+        used)."""
+        self._shared_memory = None
+        self._owner = False
+        if name is not None:
+            self._shared_memory = _open_shared_memory(name)
+            words = self._shared_memory.buf.cast('Q')
+            buckets = len(words) // 4
+        else:
+            buckets = 1
+            while buckets * 4 * _ENTRY_BYTES <= tt_size_mb * (1 << 20):
+                buckets *= 2
+            if shared:
+                self._shared_memory = shared_memory.SharedMemory(create=True, size=buckets * 2 * _ENTRY_BYTES)
+                self._owner = True
+                words = self._shared_memory.buf.cast('Q')
+                words[:] = array('Q', bytes(buckets * 2 * _ENTRY_BYTES))
+        self._bucket_mask = buckets - 1
+        if self._shared_memory is not None:
+            self._table = words
+        else:
+            self._table = array('Q', bytes(buckets * 2 * _ENTRY_BYTES))
+        self._age = 0
+
+    def get_name(self):
+        """Method takes no parameters and returns the name of the shared memory holding
+        the table, for other processes to open it with, or None if it is not shared."""
+        if self._shared_memory is None:
+            return None
+        return self._shared_memory.name
+
+    def get_size(self):
+        """Method takes no parameters and returns the number of entries the table can
+        hold."""
+        return len(self._table) // 2
+
+    def get_age(self):
+        """Method takes no parameters and returns the age of the current search."""
+        return self._age
+
+    def set_age(self, age):
+        """Method takes as a parameter the age of a search, and sets the age of the
+        current search to it, so that processes sharing the table agree on it."""
+        self._age = age & _BYTE_MASK
+
+    def new_search(self):
+        """Method takes no parameters and starts a new search by advancing the age, so
+        that entries stored by earlier searches are replaced before current ones."""
+        self._age = (self._age + 1) & _BYTE_MASK
+
+    def clear(self):
+        """Method takes no parameters and empties the table."""
+        self._table[:] = array('Q', bytes(len(self._table) * 8))
+        self._age = 0
+
+    def close(self):
+        """Method takes no parameters and lets go of the shared memory holding the
+        table, which is freed once the process that created it closes it. The table
+        cannot be used afterwards. Nothing is done for a table that is not shared."""
+        if self._shared_memory is None:
+            return
+        self._table.release()
+        self._table = array('Q')
+        self._shared_memory.close()
+        if self._owner:
+            self._shared_memory.unlink()
+        self._shared_memory = None
+
+    def probe(self, key):
+        """Method takes as a parameter the Zobrist key of a position and returns a tuple
+        of (depth, bound, score, move) stored for that position, where the move is a pair
+        of square indices or None. Returns None if the position is not in the table."""
+        table = self._table
+        index = (key & self._bucket_mask) * 4
+        for slot in (index, index + 2):
+            data = table[slot + 1]
+            if data and table[slot] ^ data == key:
+                return ((data >> _DEPTH_SHIFT) & _BYTE_MASK,
+                        (data >> _BOUND_SHIFT) & 3,
+                        (data & 0xFFFFFFFF) - _SCORE_BIAS,
+                        _decode_move((data >> _MOVE_SHIFT) & _MOVE_MASK))
+        return None
+
+    def store(self, key, depth, bound, score, move=None):
+        """Method takes as parameters the Zobrist key of a position, the depth it was
+        searched to, the bound type (EXACT, LOWER or UPPER), the score found and the
+        best move as a pair of square indices (or None), and stores them. The first
+        entry of the bucket keeps the deepest result of the current search, and it is
+        only replaced by the same position, an equal or deeper search, or once it is
+        left over from an earlier search. Any other result goes into the second entry,
+        which is always replaced. Depths are stored from 0 to 255 and scores must fit
+        in 32 bits."""
+        table = self._table
+        index = (key & self._bucket_mask) * 4
+        age = self._age
+        depth = min(max(depth, 0), _BYTE_MASK)
+
+        # a result without a best move keeps the move stored for the position before
+        if move is None:
+            for slot in (index, index + 2):
+                stored = table[slot + 1]
+                if stored and table[slot] ^ stored == key:
+                    move = _decode_move((stored >> _MOVE_SHIFT) & _MOVE_MASK)
+                    break
+        data = ((score + _SCORE_BIAS) | (_encode_move(move) << _MOVE_SHIFT) | (depth << _DEPTH_SHIFT)
+                | (bound << _BOUND_SHIFT) | (age << _AGE_SHIFT))
+
+        # a result that takes over the first entry moves the one it replaces to the second
+        stored_key = table[index]
+        stored = table[index + 1]
+        same_position = stored and stored_key ^ stored == key
+        if (same_position or not stored or ((stored >> _AGE_SHIFT) & _BYTE_MASK) != age
+                or depth >= (stored >> _DEPTH_SHIFT) & _BYTE_MASK):
+            if stored and not same_position:
+                table[index + 2] = stored_key
+                table[index + 3] = stored
+            table[index] = key ^ data
+            table[index + 1] = data
+        else:
+            table[index + 2] = key ^ data
+            table[index + 3] = data
+
+
+def _open_shared_memory(name):
+    """Function takes as a parameter the name of a block of shared memory created by
+    another process and opens it. Where Python allows it, the block is not tracked by
+    this process, so that it is only freed by the process that created it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
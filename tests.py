@@ -1,5 +1,13 @@
+import pickle
+import random
+import time
 import unittest
-from JanggiGame import JanggiGame
+from unittest import mock
+from JanggiGame import JanggiGame, Cannon, Chariot, Elephant, General, Guard, Horse, Soldier, SQUARES, SQUARE_INDEX
+from JanggiBitboard import Bitboard, cannon_attacks, chariot_attacks, square_mask
+from JanggiTransposition import TranspositionTable, EXACT, LOWER, UPPER
+from JanggiEngine import JanggiEngine, SearchTimeout, analyse
+from JanggiClock import TimeManager
 
 class TestJanggiGame(unittest.TestCase):
     def setUp(self):
@@ -1698,3 +1706,853 @@ class TestJanggiGame(unittest.TestCase):
         except:
             self.fail("Game state should be RED_WON when the BLUE general is checkmated")
 
+
+    def test_move_off_the_board_is_invalid(self):
+        """RULES: test that a move from or onto a square that is not on the board is invalid"""
+        g = JanggiGame()
+        self.assertIs(g.make_move('a7', 'a0'), False)
+        self.assertIs(g.make_move('j7', 'j6'), False)
+        self.assertIs(g.make_move('a7', 'a6'), True)
+
+    def test_game_board_uses_algebraic_squares(self):
+        """RULES: test that the game board is reported with squares in algebraic notation"""
+        g = JanggiGame()
+        board = g.get_game_board()
+        self.assertEqual(len(board), 90)
+        self.assertIs(board['e9'], g.get_square('e9'))
+        self.assertIsNone(board['e5'])
+        self.assertEqual(g.get_gen_square('blue'), 'e9')
+        self.assertEqual(g.get_gen_square('red'), 'e2')
+
+    def test_soldier_moves_diagonally_forward_in_the_palace(self):
+        """SOLDIER: test that a soldier can only move forward along the palace diagonals"""
+        board = [None] * 90
+        moves = Soldier('blue').check_move(SQUARE_INDEX['d3'], board)
+        self.assertEqual(sorted(SQUARES[m] for m in moves), ['c3', 'd2', 'd3', 'e2', 'e3'])
+        moves = Soldier('red').check_move(SQUARE_INDEX['e9'], board)
+        self.assertEqual(sorted(SQUARES[m] for m in moves), ['d10', 'd9', 'e10', 'e9', 'f10', 'f9'])
+
+    def test_horse_moves_exclude_own_pieces(self):
+        """HORSE: test that a horse cannot move onto its own piece or over a blocked leg"""
+        board = [None] * 90
+        board[SQUARE_INDEX['b8']] = Soldier('blue')
+        board[SQUARE_INDEX['d10']] = Soldier('red')
+        board[SQUARE_INDEX['b10']] = Soldier('blue')
+        moves = Horse('blue').check_move(SQUARE_INDEX['c10'], board)
+        self.assertEqual(sorted(SQUARES[m] for m in moves), ['c10', 'd8'])
+
+    def test_chariot_cannot_pass_a_piece_on_the_palace_diagonal(self):
+        """CHARIOT: test that a chariot moving along a palace diagonal stops at the first piece"""
+        board = [None] * 90
+        board[SQUARE_INDEX['e2']] = Guard('red')
+        moves = Chariot('blue').check_move(SQUARE_INDEX['d1'], board)
+        self.assertIn(SQUARE_INDEX['e2'], moves)
+        self.assertNotIn(SQUARE_INDEX['f3'], moves)
+
+    def test_cannon_jumps_along_the_red_palace_diagonal(self):
+        """CANNON: test that a cannon in the red palace jumps the diagonal screen on e2"""
+        board = [None] * 90
+        board[SQUARE_INDEX['e2']] = Guard('red')
+        board[SQUARE_INDEX['e9']] = Cannon('blue')
+        moves = Cannon('blue').check_move(SQUARE_INDEX['d1'], board)
+        self.assertIn(SQUARE_INDEX['f3'], moves)
+
+        # a cannon cannot be used as a screen
+        board[SQUARE_INDEX['e2']] = Cannon('red')
+        board[SQUARE_INDEX['e9']] = None
+        moves = Cannon('blue').check_move(SQUARE_INDEX['d1'], board)
+        self.assertNotIn(SQUARE_INDEX['f3'], moves)
+
+    def test_pieces_are_shared_and_cannot_be_changed(self):
+        """RULES: test that there is one shared, unchangeable piece of each type for each player"""
+        self.assertIs(Chariot('blue'), Chariot('blue'))
+        self.assertIsNot(Chariot('blue'), Chariot('red'))
+        self.assertIsNot(Chariot('blue'), Cannon('blue'))
+        g1 = JanggiGame()
+        g2 = JanggiGame()
+        self.assertIs(g1.get_square('a10'), g2.get_square('i10'))
+        with self.assertRaises(AttributeError):
+            Chariot('blue')._player = 'red'
+        self.assertIs(pickle.loads(pickle.dumps(Guard('red'))), Guard('red'))
+        self.assertIs(Guard('red').get_fortress('red'), Soldier('blue').get_fortress('red'))
+        self.assertIn(SQUARE_INDEX['e2'], Guard('red').get_fortress('red'))
+        self.assertEqual(len(Guard('red').get_fortress()), 18)
+
+    def test_piece_lists_follow_moves_and_captures(self):
+        """RULES: test that each player's list of pieces is updated by moves and captures"""
+        g = JanggiGame()
+        self.assertEqual(len(g.get_pieces('blue')), 16)
+        self.assertEqual(len(g.get_pieces('red')), 16)
+        g.make_move('a7', 'a6')
+        g.make_move('i4', 'i5')
+        g.make_move('a6', 'a5')
+        g.make_move('i5', 'i6')
+        g.make_move('a5', 'a4')  # blue soldier captures red soldier
+        blue_pieces = g.get_pieces('blue')
+        red_pieces = g.get_pieces('red')
+        self.assertEqual(len(blue_pieces), 16)
+        self.assertEqual(len(red_pieces), 15)
+        self.assertIs(blue_pieces['a4'], Soldier('blue'))
+        self.assertNotIn('a7', blue_pieces)
+        self.assertNotIn('a4', red_pieces)
+        g.make_move('e2', 'e2')  # red passes
+        g.make_move('e9', 'e10')  # blue general steps back, which is still tracked
+        self.assertEqual(g.get_gen_square('blue'), 'e10')
+        for player in ('blue', 'red'):
+            board_pieces = {square: piece for square, piece in g.get_game_board().items()
+                            if piece is not None and piece.get_player() == player}
+            self.assertEqual(g.get_pieces(player), board_pieces)
+
+    def test_check_by_elephant_and_soldier_is_detected(self):
+        """RULES: test that checks by an elephant, or by a soldier on a palace diagonal, are detected"""
+        g = JanggiGame()
+        for square in SQUARES:
+            if square not in ('e9', 'e2'):
+                g.set_square(square)
+        self.assertIs(g.is_in_check('blue'), False)
+        g.set_square('g6', Elephant('red'))
+        self.assertIs(g.is_in_check('blue'), True)
+        g.set_square('f8', Guard('blue'))  # blocks the elephant's second leg
+        self.assertIs(g.is_in_check('blue'), False)
+        g.set_square('d8', Soldier('red'))  # steps forward along the palace diagonal onto e9
+        self.assertIs(g.is_in_check('blue'), True)
+        g.set_square('d8')
+        g.set_square('d10', Soldier('red'))  # soldiers cannot move backward
+        self.assertIs(g.is_in_check('blue'), False)
+
+    def test_moves_can_be_taken_back(self):
+        """RULES: test that pop_move takes back moves, including captures and passes"""
+        g = JanggiGame()
+        start_board = g.get_game_board()
+        self.assertIsNone(g.pop_move())
+        g.make_move('a7', 'a6')
+        g.make_move('i4', 'i5')
+        g.make_move('a6', 'a5')
+        g.make_move('i5', 'i5')  # red passes
+        g.make_move('a5', 'a4')  # blue soldier captures red soldier
+        self.assertEqual(g.pop_move(), ('a5', 'a4'))
+        self.assertIs(g.get_square('a4'), Soldier('red'))
+        self.assertEqual(len(g.get_pieces('red')), 16)
+        self.assertEqual(g.get_player_turn(), 'blue')
+        self.assertEqual(g.pop_move(), ('i5', 'i5'))
+        self.assertEqual(g.get_player_turn(), 'red')
+        for expected in (('a6', 'a5'), ('i4', 'i5'), ('a7', 'a6')):
+            self.assertEqual(g.pop_move(), expected)
+        self.assertEqual(g.get_game_board(), start_board)
+        self.assertEqual(g.get_player_turn(), 'blue')
+
+    def test_push_move_explores_variations_in_place(self):
+        """RULES: test that push_move and pop_move leave the game as it was, including a win"""
+        g = JanggiGame()
+        moves = [('c7', 'c6'), ('c1', 'd3'), ('b10', 'd7'), ('b3', 'e3'), ('c10', 'd8'), ('h1', 'g3'),
+                 ('e7', 'e6'), ('e3', 'e6'), ('h8', 'c8'), ('d3', 'e5'), ('c8', 'c4'), ('e5', 'c4'),
+                 ('i10', 'i8'), ('g4', 'f4'), ('i8', 'f8'), ('g3', 'h5'), ('h10', 'g8'), ('e6', 'e3'),
+                 ('e9', 'd9'), ('c4', 'e5'), ('c6', 'd6'), ('e5', 'c4'), ('a7', 'a6'), ('h3', 'h9'),
+                 ('a10', 'a7'), ('c4', 'd6'), ('a6', 'b6'), ('h5', 'g7'), ('b8', 'b1'), ('a1', 'b1'),
+                 ('a7', 'a4'), ('b1', 'c1'), ('a4', 'a2'), ('e2', 'e1'), ('i7', 'h7')]
+        for current_sq, move_sq in moves:
+            self.assertIs(g.make_move(current_sq, move_sq), True)
+        board = g.get_game_board()
+        g.push_move('c1', 'c2')
+        g.push_move('h7', 'g7')  # blue captures the red horse
+        self.assertIs(g.get_square('g7'), Soldier('blue'))
+        g.pop_move()
+        g.pop_move()
+        self.assertEqual(g.get_game_board(), board)
+        self.assertEqual(g.get_player_turn(), 'red')
+        self.assertIs(g.make_move('c1', 'c9'), True)  # red chariot checkmates blue
+        self.assertEqual(g.get_game_state(), 'RED_WON')
+        self.assertEqual(g.pop_move(), ('c1', 'c9'))
+        self.assertEqual(g.get_game_state(), 'UNFINISHED')
+        self.assertEqual(g.get_gen_square('blue'), 'd9')
+        self.assertIs(g.make_move('c1', 'c2'), True)
+
+    def test_legal_moves_of_the_opening_position(self):
+        """RULES: test that the legal moves of blue in the opening position are generated"""
+        g = JanggiGame()
+        moves = list(g.legal_moves())
+        self.assertEqual(len(moves), 31)
+        self.assertIn(('c10', 'd8'), moves)
+        self.assertNotIn(('b8', 'b1'), moves)
+        self.assertEqual(list(g.legal_moves('blue', passes=True))[-1], ('e9', 'e9'))
+        self.assertEqual(sorted(g.legal_moves_from('e9')), ['d8', 'd9', 'e10', 'e8', 'f8', 'f9'])
+        self.assertEqual(list(g.legal_moves_from('e5')), [])
+        for current_sq, move_sq in moves:
+            self.assertIs(g.make_move(current_sq, move_sq), True)
+            g.pop_move()
+
+    def test_legal_moves_in_check_only_counter_the_check(self):
+        """RULES: test that legal moves while in check are exactly the moves that counter it"""
+        g = JanggiGame()
+        for current_sq, move_sq in [('c7', 'c6'), ('c1', 'd3'), ('b10', 'd7'), ('b3', 'e3'), ('c10', 'd8'),
+                                    ('h1', 'g3'), ('e7', 'e6'), ('e3', 'e6'), ('h8', 'c8'), ('d3', 'e5'),
+                                    ('c8', 'c4'), ('e5', 'c4'), ('i10', 'i8'), ('g4', 'f4'), ('i8', 'f8'),
+                                    ('g3', 'h5'), ('h10', 'g8'), ('e6', 'e3')]:
+            g.make_move(current_sq, move_sq)
+        self.assertIs(g.is_in_check('blue'), True)
+        moves = g.legal_moves()
+        first_move = next(moves)  # moves are generated lazily
+        self.assertIs(g.make_move(*first_move), True)
+        g.pop_move()
+        moves = list(g.legal_moves(passes=True))
+        self.assertNotIn(('e9', 'e9'), moves)
+        self.assertIn(('e9', 'd9'), moves)
+        self.assertNotIn(('f8', 'f7'), moves)
+        for current_sq, move_sq in moves:
+            self.assertIs(g.make_move(current_sq, move_sq), True)
+            self.assertIs(g.is_in_check('blue'), False)
+            g.pop_move()
+
+
+    def test_legal_moves_respect_pins(self):
+        """RULES: test that pieces pinned against their general by a chariot, a cannon or a horse leg cannot expose it"""
+        g = JanggiGame()
+        for square in SQUARES:
+            if square not in ('e9', 'e2'):
+                g.set_square(square)
+        g.set_square('e5', Cannon('red'))
+        g.set_square('a9', Chariot('red'))
+        g.set_square('f7', Horse('red'))
+        g.set_square('d9', Guard('blue'))  # pinned by the chariot
+        g.set_square('f8', Guard('blue'))  # blocks the horse's leg
+        g.set_square('c7', Horse('blue'))  # would become the cannon's screen on e6 or e8
+        self.assertIs(g.is_in_check('blue'), False)
+        self.assertEqual(list(g.legal_moves_from('d9')), [])
+        self.assertEqual(list(g.legal_moves_from('f8')), [])
+        self.assertEqual(sorted(g.legal_moves_from('c7')), ['a6', 'a8', 'b5', 'b9', 'd5'])
+        g.set_square('a9')
+        self.assertEqual(sorted(g.legal_moves_from('d9')), ['d10', 'd8'])
+        g.set_square('e7', Cannon('blue'))  # a cannon cannot be a screen for a cannon
+        self.assertIs(g.is_in_check('blue'), False)
+        self.assertEqual(sorted(g.legal_moves_from('c7')), ['a6', 'a8', 'b5', 'b9', 'd5', 'e6', 'e8'])
+
+
+    def test_legal_moves_evade_cannon_and_double_checks(self):
+        """RULES: test that a cannon check is evaded by moving its screen or adding a second screen, and a double check only by the general"""
+        g = JanggiGame()
+        for square in SQUARES:
+            if square not in ('e9', 'e2'):
+                g.set_square(square)
+        g.set_square('e5', Cannon('red'))
+        g.set_square('e7', Soldier('blue'))  # the cannon's screen
+        g.set_square('c7', Horse('blue'))
+        self.assertIs(g.is_in_check('blue'), True)
+        self.assertEqual(sorted(g.legal_moves('blue')),
+                         [('c7', 'e6'), ('c7', 'e8'), ('e7', 'd7'), ('e7', 'f7'), ('e9', 'd10'),
+                          ('e9', 'd8'), ('e9', 'd9'), ('e9', 'f10'), ('e9', 'f8'), ('e9', 'f9')])
+        g.set_square('c8', Horse('red'))
+        self.assertEqual(sorted(g.legal_moves('blue')),
+                         [('e9', 'd8'), ('e9', 'd9'), ('e9', 'f10'), ('e9', 'f8'), ('e9', 'f9')])
+        self.assertIs(g.is_checkmate('blue'), False)
+
+
+    def test_position_key_identifies_positions(self):
+        """RULES: test that the position key is kept up to date by moves, passes and takebacks"""
+        g = JanggiGame()
+        start_key = g.position_key()
+        for current_sq, move_sq in [('c7', 'c6'), ('c4', 'c5'), ('b10', 'd7'), ('e2', 'e2')]:
+            g.make_move(current_sq, move_sq)
+        h = JanggiGame()
+        for current_sq, move_sq in [('b10', 'd7'), ('e2', 'e2'), ('c7', 'c6'), ('c4', 'c5')]:
+            h.make_move(current_sq, move_sq)
+        self.assertEqual(g.position_key(), h.position_key())
+        self.assertEqual(g.get_game_board(), h.get_game_board())
+        g.make_move('e9', 'e9')
+        self.assertNotEqual(g.position_key(), h.position_key())  # same pieces, red to move
+        g.pop_move()
+        self.assertEqual(g.position_key(), h.position_key())
+
+        # a position set up square by square has the same key as one reached by moves
+        random.seed(13)
+        for ply in range(60):
+            g.make_move(*random.choice(list(g.legal_moves())))
+        k = JanggiGame()
+        for square, piece in g.get_game_board().items():
+            k.set_square(square, piece)
+        k.set_player_turn(g.get_player_turn())
+        self.assertEqual(k.position_key(), g.position_key())
+        for ply in range(64):
+            g.pop_move()
+        self.assertEqual(g.position_key(), start_key)
+
+
+    def test_perft_counts_the_legal_move_tree(self):
+        """RULES: test the number of move sequences from the opening position, with and without passing"""
+        g = JanggiGame()
+        self.assertEqual(g.perft(0), 1)
+        self.assertEqual(g.perft(1), 31)
+        self.assertEqual(g.perft(1, passes=True), 32)
+        self.assertEqual(g.perft(2), 961)
+        self.assertEqual(g.perft(2, passes=True), 1024)
+        self.assertEqual(g.perft(3), 30506)
+        divide = g.perft_divide(3, passes=True)
+        self.assertEqual(len(divide), 32)
+        self.assertEqual(sum(divide.values()), 33506)
+        g.make_move('e9', 'e9')
+        self.assertEqual(divide[('e9', 'e9')], g.perft(2, passes=True))
+        g.pop_move()
+        self.assertEqual(g.get_game_board(), JanggiGame().get_game_board())
+
+
+    def test_perft_with_worker_processes(self):
+        """RULES: test that perft shared out between worker processes gives the same count"""
+        g = JanggiGame()
+        g.make_move('c7', 'c6')
+        self.assertEqual(g.perft(3, passes=True, workers=2), g.perft(3, passes=True))
+        report = g.perft_report(3, workers=2)
+        self.assertLessEqual(len(report), 2)
+        self.assertEqual(sum(nodes for worker, nodes, nodes_per_second in report), g.perft(3))
+        for worker, nodes, nodes_per_second in report:
+            self.assertGreater(nodes_per_second, 0)
+
+
+    def test_score_and_evaluation_follow_moves(self):
+        """RULES: test the official point count, and that the evaluation is kept up to date by moves and takebacks"""
+        g = JanggiGame()
+        self.assertEqual(g.score('blue'), 72)
+        self.assertEqual(g.score('red'), 73.5)
+        self.assertEqual(g.evaluate(), 0)
+        for current_sq, move_sq in [('c7', 'c6'), ('c1', 'd3'), ('b10', 'd7'), ('b3', 'e3'), ('c10', 'd8'),
+                                    ('h1', 'g3'), ('e7', 'e6'), ('e3', 'e6')]:
+            g.make_move(current_sq, move_sq)
+        self.assertEqual(g.score('blue'), 70)
+        self.assertEqual(g.score('red'), 73.5)
+        random.seed(20)
+        for ply in range(60):
+            g.make_move(*random.choice(list(g.legal_moves(passes=True))))
+            k = JanggiGame()
+            for square, piece in g.get_game_board().items():
+                k.set_square(square, piece)
+            k.set_player_turn(g.get_player_turn())
+            self.assertEqual(k.evaluate(), g.evaluate())
+            self.assertEqual(k.score('red'), g.score('red'))
+        for ply in range(68):
+            g.pop_move()
+        self.assertEqual(g.evaluate(), 0)
+        self.assertEqual(g.score('blue'), 72)
+
+
+class TestBitboard(unittest.TestCase):
+    def play_random_moves(self, g, rng, count, on_move=None):
+        """play up to count random moves that are accepted by make_move"""
+        for step in range(count):
+            if g.get_game_state() != 'UNFINISHED':
+                return
+            board = g.get_game_board()
+            own = [sq for sq, piece in board.items()
+                   if piece is not None and piece.get_player() == g.get_player_turn()]
+            current_sq = rng.choice(own)
+            moves = board[current_sq].check_move(SQUARE_INDEX[current_sq], list(board.values()))
+            move_sq = SQUARES[rng.choice(moves)]
+            if g.make_move(current_sq, move_sq) and on_move is not None:
+                on_move(current_sq, move_sq)
+
+    def test_bitboard_moves_match_check_move(self):
+        """BITBOARD: test that bitboard moves match check_move for every piece in random games"""
+        rng = random.Random(2021)
+        for game_number in range(5):
+            g = JanggiGame()
+            bb = Bitboard(g)
+
+            def on_move(current_sq, move_sq):
+                bb.move_piece(SQUARE_INDEX[current_sq], SQUARE_INDEX[move_sq])
+                squares = [g.get_square(name) for name in SQUARES]
+                for square, piece in enumerate(squares):
+                    if piece is not None:
+                        moves = [move for move in piece.check_move(square, squares) if move != square]
+                        self.assertEqual(bb.get_moves(square), square_mask(moves))
+                for player in ('blue', 'red'):
+                    self.assertEqual(bb.is_in_check(player), g.is_in_check(player))
+
+            self.play_random_moves(g, rng, 60, on_move)
+
+    def test_sliding_attacks_from_line_occupancy(self):
+        """BITBOARD: test chariot and cannon attacks looked up from rank and file occupancy"""
+        g = JanggiGame()
+        bb = Bitboard(g)
+        occupied = bb.get_occupied()
+        files = bb.get_file_occupancy()
+        cannons = bb.get_pieces('blue', Cannon) | bb.get_pieces('red', Cannon)
+        chariot = chariot_attacks(SQUARE_INDEX['a10'], occupied, files)
+        self.assertEqual(chariot, square_mask(SQUARE_INDEX[sq] for sq in ('a9', 'a8', 'a7', 'b10')))
+        cannon = cannon_attacks(SQUARE_INDEX['b8'], occupied, files, cannons)
+        self.assertEqual(cannon, 0)
+        g.make_move('g7', 'h7')
+        bb = Bitboard(g)
+        cannon = cannon_attacks(SQUARE_INDEX['h8'], bb.get_occupied(), bb.get_file_occupancy(), cannons)
+        self.assertEqual(cannon, square_mask(SQUARE_INDEX[sq] for sq in ('h6', 'h5', 'h4', 'h3')))
+        self.assertEqual(bb.get_moves(SQUARE_INDEX['h8']),
+                         square_mask(SQUARE_INDEX[sq] for sq in ('h6', 'h5', 'h4')))
+
+    def test_bitboard_detects_check(self):
+        """BITBOARD: test that a cannon check through a screen is detected by the bitboard"""
+        g = JanggiGame()
+        g.make_move('c7', 'c6')
+        g.make_move('c1', 'd3')
+        g.make_move('b10', 'd7')
+        g.make_move('b3', 'e3')
+        g.make_move('c10', 'd8')
+        g.make_move('h1', 'g3')
+        g.make_move('e7', 'e6')
+        g.make_move('e3', 'e6')
+        g.make_move('h8', 'c8')
+        g.make_move('d3', 'e5')
+        g.make_move('c8', 'c4')
+        g.make_move('e5', 'c4')
+        g.make_move('i10', 'i8')
+        g.make_move('g4', 'f4')
+        g.make_move('i8', 'f8')
+        g.make_move('g3', 'h5')
+        g.make_move('h10', 'g8')
+        g.make_move('e6', 'e3')
+        bb = Bitboard(g)
+        self.assertIs(bb.is_in_check('blue'), True)
+        self.assertIs(bb.is_in_check('red'), False)
+        self.assertTrue(bb.get_attacked_squares('red') >> SQUARE_INDEX['e9'] & 1)
+
+
+class TestTranspositionTable(unittest.TestCase):
+    def test_entries_are_stored_and_probed_by_key(self):
+        """test that an entry is found by its key with the depth, bound, score and move it was stored with"""
+        tt = TranspositionTable(tt_size_mb=1)
+        self.assertEqual(tt.get_size(), 65536)
+        g = JanggiGame()
+        key = g.position_key()
+        self.assertIsNone(tt.probe(key))
+        tt.store(key, 4, LOWER, -120, (SQUARE_INDEX['c7'], SQUARE_INDEX['c6']))
+        self.assertEqual(tt.probe(key), (4, LOWER, -120, (SQUARE_INDEX['c7'], SQUARE_INDEX['c6'])))
+        tt.store(key, 5, UPPER, 35)  # a result without a move keeps the stored move
+        self.assertEqual(tt.probe(key), (5, UPPER, 35, (SQUARE_INDEX['c7'], SQUARE_INDEX['c6'])))
+        g.make_move('c7', 'c6')
+        self.assertIsNone(tt.probe(g.position_key()))
+        tt.clear()
+        self.assertIsNone(tt.probe(key))
+
+    def test_replacement_prefers_depth_then_age(self):
+        """test that the deepest entry of a bucket is kept until a later search, while the other entry is always replaced"""
+        tt = TranspositionTable(tt_size_mb=1)
+        buckets = tt.get_size() // 2
+        deep, shallow, newer = 7, 7 + buckets, 7 + 2 * buckets  # keys that share a bucket
+        tt.store(deep, 6, EXACT, 10)
+        tt.store(shallow, 2, EXACT, 20)
+        tt.store(newer, 3, EXACT, 30)
+        self.assertEqual(tt.probe(deep), (6, EXACT, 10, None))
+        self.assertIsNone(tt.probe(shallow))
+        self.assertEqual(tt.probe(newer), (3, EXACT, 30, None))
+        tt.new_search()
+        tt.store(shallow, 1, EXACT, 20)  # the deep entry is left over from the last search
+        self.assertEqual(tt.probe(shallow), (1, EXACT, 20, None))
+        self.assertEqual(tt.probe(deep), (6, EXACT, 10, None))
+        self.assertIsNone(tt.probe(newer))
+
+
+    def test_shared_table_is_opened_by_name_and_torn_entries_are_ignored(self):
+        """test that a table in shared memory is seen by another handle and that an entry whose words do not match is ignored"""
+        tt = TranspositionTable(tt_size_mb=1, shared=True)
+        other = TranspositionTable(name=tt.get_name())
+        try:
+            self.assertEqual(other.get_size(), tt.get_size())
+            tt.store(12345, 3, EXACT, 50, (1, 2))
+            self.assertEqual(other.probe(12345), (3, EXACT, 50, (1, 2)))
+            index = (12345 % (tt.get_size() // 2)) * 4
+            tt._table[index + 1] ^= 1 << 40  # as if another process had half written the entry
+            self.assertIsNone(other.probe(12345))
+            other.clear()
+            self.assertIsNone(tt.probe(12345))
+        finally:
+            other.close()
+            tt.close()
+        self.assertIsNone(TranspositionTable(tt_size_mb=1).get_name())
+
+
+class TestJanggiEngine(unittest.TestCase):
+    def play(self, moves):
+        """return a new game with the moves made"""
+        g = JanggiGame()
+        for current_sq, move_sq in moves:
+            self.assertIs(g.make_move(current_sq, move_sq), True)
+        return g
+
+    def test_engine_takes_a_free_piece(self):
+        """test that the engine captures an undefended horse with its chariot"""
+        g = self.empty_board()
+        g.set_square('c8', Chariot('blue'))
+        g.set_square('c3', Horse('red'))
+        g.set_square('g4', Soldier('red'))
+        engine = JanggiEngine(g)
+        for depth in (1, 2, 3):
+            self.assertEqual(engine.best_move(depth=depth), ('c8', 'c3'))
+
+    def test_captures_are_ordered_by_victim_then_attacker(self):
+        """test that captures are searched first, most valuable victim first and then least valuable attacker first"""
+        g = JanggiGame()
+        for square in SQUARES:
+            if square not in ('e9', 'e2'):
+                g.set_square(square)
+        g.set_square('a3', Chariot('blue'))
+        g.set_square('c4', Soldier('blue'))
+        g.set_square('c3', Chariot('red'))
+        g.set_square('d4', Cannon('red'))
+        g.set_square('a2', Soldier('red'))
+        engine = JanggiEngine(g)
+        moves = [(SQUARES[current_sq], SQUARES[move_sq])
+                 for current_sq, move_sq in engine._ordered_moves(engine._moves('blue'), None, 0)]
+        self.assertEqual(moves[:4], [('c4', 'c3'), ('a3', 'c3'), ('c4', 'd4'), ('a3', 'a2')])
+        self.assertEqual(moves[-1], ('e9', 'e9'))
+
+    def empty_board(self):
+        """return a new game with only the two generals on the board"""
+        g = JanggiGame()
+        for square in SQUARES:
+            if square not in ('e9', 'e2'):
+                g.set_square(square)
+        return g
+
+    def test_static_exchange_evaluation(self):
+        """test that exchanges on a square are resolved with each capture changing the attackers"""
+        g = self.empty_board()
+        engine = JanggiEngine(g)
+        g.set_square('c7', Chariot('blue'))
+        g.set_square('c8', Chariot('blue'))  # recaptures through the square c7 is leaving
+        g.set_square('c5', Soldier('red'))
+        g.set_square('c4', Soldier('red'))
+        self.assertEqual(engine._see(SQUARE_INDEX['c7'], SQUARE_INDEX['c5']), 200 - 1300 + 200)
+        g.set_square('c8')
+        self.assertEqual(engine._see(SQUARE_INDEX['c7'], SQUARE_INDEX['c5']), 200 - 1300)
+        g.set_square('c4')
+        g.set_square('c9', Cannon('red'))  # attacks c5 only while the chariot screens it on c7
+        self.assertEqual(engine._see(SQUARE_INDEX['c7'], SQUARE_INDEX['c5']), 200)
+        self.assertEqual(g.get_square('c7'), Chariot('blue'))
+
+        # the cannon takes back using d1 as its screen, and red stops there, since taking
+        # the cannon with d1 would open the rank for the chariot on g1 to take back again
+        g = self.empty_board()
+        engine = JanggiEngine(g)
+        g.set_square('a3', Chariot('red'))
+        g.set_square('a1', Horse('blue'))
+        g.set_square('e1', Cannon('blue'))
+        g.set_square('d1', Chariot('red'))
+        g.set_square('g1', Chariot('blue'))
+        g.set_player_turn('red')
+        self.assertEqual(engine._see(SQUARE_INDEX['a3'], SQUARE_INDEX['a1']), 500 - 1300)
+
+    def test_quiescence_sees_the_recapture(self):
+        """test that the engine does not take a defended soldier with its chariot at the end of the search"""
+        g = self.empty_board()
+        g.set_square('c8', Chariot('blue'))
+        g.set_square('c5', Soldier('red'))
+        g.set_square('c4', Soldier('red'))
+        engine = JanggiEngine(g)
+        self.assertNotEqual(engine.best_move(depth=1), ('c8', 'c5'))
+        g.set_square('c4')
+        self.assertEqual(engine.best_move(depth=1), ('c8', 'c5'))
+
+    def test_engine_with_pruning_in_a_soldier_endgame(self):
+        """test that searches deep enough to prune after a pass still win a piece when only soldiers are left"""
+        g = self.empty_board()
+        g.set_square('e2')
+        g.set_square('f1', General('red'))
+        g.set_gen_square('red', 'f1')
+        g.set_square('d3', Soldier('blue'))
+        g.set_square('c3', Elephant('red'))
+        g.set_square('g5', Soldier('red'))
+        engine = JanggiEngine(g)
+        for depth in (3, 4, 5, 6):
+            self.assertEqual(engine.best_move(depth=depth), ('d3', 'c3'))
+
+    def test_pass_cutoff_is_verified_without_passing(self):
+        """test that in an endgame a cutoff after a pass is rejected when only passing reaches beta"""
+        g = JanggiGame()
+        for square in SQUARES:
+            g.set_square(square)
+        g.set_square('d10', General('blue'))
+        g.set_gen_square('blue', 'd10')
+        g.set_square('e2', General('red'))
+        g.set_square('a3', Soldier('blue'))  # every move of the soldier is onto a square the horse attacks
+        g.set_square('c1', Horse('red'))
+        g.set_square('i9', Chariot('red'))  # the chariots keep the general from moving
+        g.set_square('e4', Chariot('red'))
+        engine = JanggiEngine(g)
+        beta = g.evaluate() - 50
+
+        # passing keeps the soldier, and any other move loses it
+        self.assertGreaterEqual(engine._negamax(1, beta - 1, beta, 0, False), beta)
+        engine._tt.clear()
+        self.assertLess(engine._negamax(1, beta - 1, beta, 0, False, False), beta)
+        self.assertIsNone(engine._tt.probe(g.position_key()))
+
+        # so the pass does not cut the search off, and the position is searched in full
+        score = engine._negamax(3, beta - 1, beta, 0)
+        self.assertLess(score, beta)
+        self.assertEqual(engine._tt.probe(g.position_key())[:3], (3, UPPER, score))
+
+    def test_engine_finds_checkmate(self):
+        """test that the engine finds a checkmate in one move and that the game is left as it was"""
+        g = self.play([('c7', 'c6'), ('c1', 'd3'), ('b10', 'd7'), ('b3', 'e3'), ('c10', 'd8'), ('h1', 'g3'),
+                       ('e7', 'e6'), ('e3', 'e6'), ('h8', 'c8'), ('d3', 'e5'), ('c8', 'c4'), ('e5', 'c4'),
+                       ('i10', 'i8'), ('g4', 'f4'), ('i8', 'f8'), ('g3', 'h5'), ('h10', 'g8'), ('e6', 'e3'),
+                       ('e9', 'd9'), ('c4', 'e5'), ('c6', 'd6'), ('e5', 'c4'), ('a7', 'a6'), ('h3', 'h9'),
+                       ('a10', 'a7'), ('c4', 'd6'), ('a6', 'b6'), ('h5', 'g7'), ('b8', 'b1'), ('a1', 'b1'),
+                       ('a7', 'a4'), ('b1', 'c1'), ('a4', 'a2'), ('e2', 'e1'), ('i7', 'h7')])
+        board = g.get_game_board()
+        key = g.position_key()
+        move = JanggiEngine(g).best_move(depth=2)
+        self.assertEqual(g.get_game_board(), board)
+        self.assertEqual(g.position_key(), key)
+        self.assertIs(g.make_move(*move), True)
+        self.assertEqual(g.get_game_state(), 'RED_WON')
+        self.assertIsNone(JanggiEngine(g).best_move(depth=2))
+
+    def test_engine_keeps_to_its_time_limit(self):
+        """test that a search with a time limit returns a legal move in time and leaves the game as it was"""
+        g = JanggiGame()
+        engine = JanggiEngine(g)
+        start_time = time.perf_counter()
+        move = engine.best_move(time_limit=0.2)
+        self.assertLess(time.perf_counter() - start_time, 0.5)
+        self.assertIn(move, list(g.legal_moves(passes=True)))
+        self.assertEqual(g.get_game_board(), JanggiGame().get_game_board())
+        self.assertEqual(g.get_player_turn(), 'blue')
+        self.assertGreater(engine.get_nodes(), 0)
+
+    def test_engine_reads_its_clock_by_the_slowest_work(self):
+        """test that the clock is read after as many units of work as the slowest units take to fill a period,
+        and that the search stops at its deadline, with the clock given by the test"""
+        now = [0.0]
+        with mock.patch('JanggiEngine.time', mock.Mock(perf_counter=lambda: now[0])):
+            engine = JanggiEngine(JanggiGame())
+            engine._start_search(1.0)
+
+            # 100 units in 5 ms: 50 microseconds a unit, so 20 units fill a 1 ms period
+            now[0] = 0.005
+            engine._add_work(100)
+            self.assertEqual(engine._next_clock_read, 120)
+
+            # faster units do not lengthen the interval
+            now[0] = 0.0051
+            engine._add_work(20)
+            self.assertEqual(engine._next_clock_read, 140)
+
+            # slower ones shorten it: 20 units in 4 ms is 200 microseconds a unit
+            now[0] = 0.0091
+            engine._add_work(20)
+            self.assertEqual(engine._next_clock_read, 145)
+
+            # no read is made before the interval is counted, even past the deadline
+            now[0] = 1.0
+            engine._add_work(4)
+            self.assertRaises(SearchTimeout, engine._visit)
+
+            # a search stops short of its time limit by the margin it keeps
+            g = JanggiGame()
+            engine = JanggiEngine(g)
+            reads = []
+
+            def perf_counter():
+                reads.append(now[0])
+                now[0] += 0.0005
+                return reads[-1]
+
+            now[0] = 0.0
+            with mock.patch('JanggiEngine.time', mock.Mock(perf_counter=perf_counter)):
+                move = engine.best_move(time_limit=0.1)
+            self.assertIn(move, list(g.legal_moves(passes=True)))
+            self.assertLess(reads[-1], 0.1)
+
+    def test_parallel_search_shares_one_table(self):
+        """test that a search split between worker processes finds the same capture and returns a legal move in time"""
+        g = self.empty_board()
+        g.set_square('c8', Chariot('blue'))
+        g.set_square('c3', Horse('red'))
+        g.set_square('g4', Soldier('red'))
+        engine = JanggiEngine(g, workers=2)
+        try:
+            self.assertEqual(engine.best_move(depth=3), ('c8', 'c3'))
+            self.assertGreater(engine.get_nodes(), 0)
+            g.make_move('c8', 'c3')
+            start_time = time.perf_counter()
+            move = engine.best_move(time_limit=0.3)
+            self.assertLess(time.perf_counter() - start_time, 1.0)
+            self.assertIn(move, list(g.legal_moves(passes=True)))
+        finally:
+            engine.close()
+
+    def test_analysis_reports_the_best_lines(self):
+        """test that analysis returns the best moves in order with their scores and playable principal variations"""
+        g = self.empty_board()
+        g.set_square('c8', Chariot('blue'))
+        g.set_square('c3', Horse('red'))
+        g.set_square('g8', Soldier('red'))
+        engine = JanggiEngine(g)
+        lines = analyse(g, 3, multipv=3, engine=engine)
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines[0][0], ('c8', 'c3'))
+        self.assertGreater(lines[0][1], lines[1][1])
+        self.assertGreaterEqual(lines[1][1], lines[2][1])
+        self.assertEqual(len(set(move for move, score, pv in lines)), 3)
+        for move, score, pv in lines:
+            self.assertEqual(pv[0], move)
+            self.assertLessEqual(len(pv), 3)
+            line_game = self.empty_board()
+            line_game.set_square('c8', Chariot('blue'))
+            line_game.set_square('c3', Horse('red'))
+            line_game.set_square('g8', Soldier('red'))
+            for current_sq, move_sq in pv:
+                self.assertIn((current_sq, move_sq), list(line_game.legal_moves(passes=True)))
+                line_game.make_move(current_sq, move_sq)
+        self.assertEqual(g.get_player_turn(), 'blue')
+        self.assertIs(g.get_square('c8'), Chariot('blue'))
+
+        # a second analysis reuses the table and agrees with the search for the best move
+        self.assertEqual(engine.analyse(3)[0][0], engine.best_move(depth=3))
+        self.assertEqual(len(analyse(JanggiGame(), 1, multipv=100)), len(list(JanggiGame().legal_moves(passes=True))))
+
+    def mated_board(self):
+        """return a game where blue is checkmated by three chariots but the game state was not updated"""
+        g = self.empty_board()
+        for square in ('a8', 'a9', 'a10'):
+            g.set_square(square, Chariot('red'))
+        return g
+
+    def test_analysis_without_moves(self):
+        """test that analysis returns no lines when the player to move has no moves"""
+        g = self.mated_board()
+        self.assertEqual(g.get_game_state(), 'UNFINISHED')
+        self.assertIsNone(JanggiEngine(g).best_move())
+        self.assertEqual(analyse(g, 2, multipv=3), [])
+
+    def test_pondering_without_moves(self):
+        """test that the engine does not ponder when the opponent has no moves"""
+        engine = JanggiEngine(self.mated_board())
+        self.assertIsNone(engine.ponder())
+        self.assertIs(engine.is_pondering(), False)
+
+    def test_pondering_on_the_predicted_reply(self):
+        """test that pondering answers from its search when the prediction is played and is cancelled when it is not"""
+        g = JanggiGame()
+        engine = JanggiEngine(g)
+        g.make_move(*engine.best_move(depth=2))
+        board = g.get_game_board()
+        prediction = engine.ponder()
+        self.assertIn(prediction, list(g.legal_moves(passes=True)))
+        self.assertIs(engine.is_pondering(), True)
+        thread = engine._ponder[1]
+        time.sleep(0.1)
+        self.assertEqual(g.get_game_board(), board)
+        g.make_move(*prediction)
+        move = engine.best_move(depth=2)
+        self.assertIs(engine.is_pondering(), False)
+        self.assertIs(thread.is_alive(), False)
+        self.assertIn(move, list(g.legal_moves(passes=True)))
+        self.assertGreater(engine.get_nodes(), 0)
+
+        # a reply that was not predicted stops pondering, and the move is searched as usual
+        g.make_move(*move)
+        prediction = engine.ponder()
+        thread = engine._ponder[1]
+        g.make_move(*[reply for reply in g.legal_moves() if reply != prediction][0])
+        start_time = time.perf_counter()
+        move = engine.best_move(time_limit=0.2)
+        self.assertLess(time.perf_counter() - start_time, 0.5)
+        self.assertIs(thread.is_alive(), False)
+        self.assertIn(move, list(g.legal_moves(passes=True)))
+
+        # the time spent pondering counts against the time limit or the clock's budget,
+        # so a hit after pondering for longer is answered at once
+        for clock in (None, TimeManager(6)):
+            g.make_move(*move)
+            prediction = engine.ponder()
+            time.sleep(0.5)
+            g.make_move(*prediction)
+            start_time = time.perf_counter()
+            if clock is None:
+                move = engine.best_move(time_limit=0.3)
+            else:
+                move = engine.best_move(clock=clock)
+                self.assertGreater(clock.get_remaining(), 5.9)
+            self.assertLess(time.perf_counter() - start_time, 0.1)
+            self.assertIn(move, list(g.legal_moves(passes=True)))
+
+        # stopping pondering leaves the game as it was
+        board = g.get_game_board()
+        engine.ponder()
+        engine.stop_pondering()
+        self.assertIs(engine.is_pondering(), False)
+        self.assertEqual(g.get_game_board(), board)
+
+    def test_engine_plays_on_a_clock(self):
+        """test that a search on a game clock stays within its budget and charges the clock"""
+        g = JanggiGame()
+        engine = JanggiEngine(g)
+        clock = TimeManager(3)
+        soft_limit, hard_limit = clock.budget()
+        start_time = time.perf_counter()
+        move = engine.best_move(clock=clock)
+        elapsed = time.perf_counter() - start_time
+        self.assertIn(move, list(g.legal_moves(passes=True)))
+        self.assertLess(elapsed, hard_limit + 0.1)
+        self.assertAlmostEqual(clock.get_remaining(), 3 - elapsed, delta=0.05)
+        self.assertIs(clock.is_flagged(), False)
+
+        # in byo-yomi a move is made within the period, less the overhead
+        clock = TimeManager(0, byoyomi=0.3, periods=1)
+        start_time = time.perf_counter()
+        move = engine.best_move(clock=clock)
+        self.assertLess(time.perf_counter() - start_time, 0.3)
+        self.assertIn(move, list(g.legal_moves(passes=True)))
+        self.assertEqual(clock.get_periods(), 1)
+        self.assertIs(clock.is_flagged(), False)
+
+        # a depth limit is still kept to, with the time charged
+        clock = TimeManager(60)
+        self.assertIn(engine.best_move(depth=1, clock=clock), list(g.legal_moves(passes=True)))
+        self.assertLess(clock.get_remaining(), 60)
+
+
+class TestTimeManager(unittest.TestCase):
+    def test_sudden_death_budget(self):
+        """test that the main time is shared between the moves left, with a hard limit that keeps back the overhead"""
+        clock = TimeManager(300)
+        self.assertEqual(clock.budget(), (10, 40))
+        clock = TimeManager(0.1, overhead=0.05)
+        soft_limit, hard_limit = clock.budget()
+        self.assertLessEqual(soft_limit, hard_limit)
+        self.assertLessEqual(hard_limit, 0.05)
+        self.assertEqual(TimeManager(0).budget(), (0, 0))
+
+    def test_increment_is_added_after_each_move(self):
+        """test that the increment is part of the budget and is added back after a move"""
+        clock = TimeManager(60, increment=5)
+        self.assertEqual(clock.budget(), (7, 28))
+        clock.charge(3)
+        self.assertEqual(clock.get_remaining(), 62)
+        clock.charge(70)
+        self.assertIs(clock.is_flagged(), True)
+        self.assertEqual(clock.get_remaining(), 0)
+
+    def test_byoyomi_periods(self):
+        """test that once the main time is used up each move has a period, and a period is lost for each one run past"""
+        clock = TimeManager(10, byoyomi=30, periods=3)
+        self.assertEqual(clock.budget(), (15, 29.95))
+        clock.charge(25)
+        self.assertEqual(clock.get_remaining(), 0)
+        self.assertEqual(clock.get_periods(), 3)
+        clock.charge(29)
+        self.assertEqual(clock.get_periods(), 3)
+        clock.charge(65)
+        self.assertEqual(clock.get_periods(), 1)
+        self.assertIs(clock.is_flagged(), False)
+        self.assertEqual(clock.budget(), (15, 29.95))
+        clock.charge(31)
+        self.assertEqual(clock.get_periods(), 0)
+        self.assertIs(clock.is_flagged(), True)
+
+    def test_turns_are_timed(self):
+        """test that the time between the start and end of a turn is charged to the clock"""
+        clock = TimeManager(10)
+        self.assertIsNone(clock.end_turn())
+        self.assertEqual(clock.start_turn(), clock.budget())
+        time.sleep(0.05)
+        elapsed = clock.end_turn()
+        self.assertGreaterEqual(elapsed, 0.05)
+        self.assertAlmostEqual(clock.get_remaining(), 10 - elapsed)